@@ -0,0 +1,46 @@
+"""从 CSV 或 NDJSON 文件批量导入用户
+
+用法: python -m app._import_users users.csv [--group-id 1 --group-id 2]
+"""
+
+import argparse
+import asyncio
+from pathlib import Path
+
+from app.services import user as user_service
+from app.utils import db, hasher
+from app.utils.log import logger, setup_logger
+
+
+async def _read_chunks(path: Path, size: int = 1 << 16):
+    """分块读取文件"""
+    with path.open("rb") as f:
+        while chunk := f.read(size):
+            yield chunk
+
+
+async def main(path: Path, group_ids: list[int]):
+    setup_logger()
+    file_format = "csv" if path.suffix.lower() == ".csv" else "ndjson"
+    async for db_session in db.get_auth_db():
+        result = await user_service.import_users(
+            db_session,
+            user_service.iter_lines(_read_chunks(path)),
+            file_format,
+            group_ids,
+        )
+        for error in result.errors:
+            logger.warning(f"Line {error.line} ({error.email}): {error.message}")
+        logger.info(f"Imported users: created={result.created}, failed={result.failed}")
+    await db.close_all()
+    hasher.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="批量导入用户")
+    parser.add_argument("path", type=Path, help="CSV（含表头）或 NDJSON 文件")
+    parser.add_argument(
+        "--group-id", type=int, action="append", default=[], help="新用户加入的组ID"
+    )
+    args = parser.parse_args()
+    asyncio.run(main(args.path, args.group_id))
@@ -2,6 +2,7 @@
 
 import asyncio
 import logging
+import re
 import sys
 from pathlib import Path
 
@@ -22,6 +23,9 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# 关键字搜索索引表（SQLite FTS5 虚拟表及其影子表），不生成表模型
+SEARCH_INDEX_TABLE = re.compile(r"_fts(_\w+)?$")
+
 
 class DBInit:
     def __init__(self, config):
@@ -45,7 +49,9 @@ class DBInit:
         engine = create_engine(self.db_url)
         # 创建元数据对象并反射数据库结构
         metadata = MetaData()
-        metadata.reflect(engine)
+        metadata.reflect(
+            engine, only=lambda name, _: not SEARCH_INDEX_TABLE.search(name)
+        )
         # 使用 DeclarativeGenerator 生成模型代码
         generator = DeclarativeGenerator(metadata, engine, [])
         code = generator.generate()
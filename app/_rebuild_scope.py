@@ -0,0 +1,22 @@
+"""重建用户有效权限物化表
+
+用于修复 user_scope 与组、权限关联关系之间的数据漂移（例如直接修改数据库后）
+"""
+
+import asyncio
+
+from app.repositories import user_scope as user_scope_repo
+from app.utils import db
+from app.utils.log import logger, setup_logger
+
+
+async def main():
+    setup_logger()
+    async for db_session in db.get_auth_db():
+        total = await user_scope_repo.rebuild(db_session)
+        logger.info(f"Rebuilt effective scopes for {total} users")
+    await db.close_all()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
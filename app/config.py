@@ -1,4 +1,6 @@
+from datetime import datetime
 from pathlib import Path
+from typing import Literal
 
 import dotenv
 from omegaconf import OmegaConf
@@ -29,6 +31,8 @@ class SQLiteCfg(BaseModel):
 class DBCfg(BaseModel):
     driver: str
     configs: dict[str, MySQLCfg | SQLiteCfg]
+    count_strategy: Literal["exact", "cached", "estimated"] = "exact"
+    count_cache_ttl: int = 10
 
 
 # 日志
@@ -39,14 +43,68 @@ class LogCfg(BaseModel):
     to_file: bool
     log_dir: str
     max_file_size: str
+    quiet_paths: list[str] = []
+    server_timing: bool = False
 
 
 # 认证配置
+def _resolve_key_path(v: str | None) -> str | None:
+    """将密钥文件相对路径转换为项目根目录下的绝对路径"""
+    if not v:
+        return None
+    root_dir = Path(__file__).parent.parent
+    p = root_dir / v
+    return str(p.resolve())
+
+
+class RetiredKeyCfg(BaseModel):
+    kid: str
+    algorithm: str
+    secret_key: str | None = None
+    public_key: str | None = None
+    not_after: datetime | None = None
+
+    @field_validator("public_key")
+    @classmethod
+    def resolve_key_path(cls, v: str | None) -> str | None:
+        return _resolve_key_path(v)
+
+    @field_validator("not_after")
+    @classmethod
+    def to_local_time(cls, v: datetime | None) -> datetime | None:
+        # 带时区的时间转为不带时区的本地时间，以便与 datetime.now() 比较
+        if v is not None and v.tzinfo is not None:
+            return v.astimezone().replace(tzinfo=None)
+        return v
+
+
 class AuthCfg(BaseModel):
     secret_key: str
     algorithm: str
+    private_key: str | None = None
+    public_key: str | None = None
+    kid: str = "default"
+    retired_keys: list[RetiredKeyCfg] = []
+    keys_reload_interval: int = 30
     access_token_expire_minutes: int
     refresh_token_expire_days: int
+    jwks_max_age: int = 3600
+    token_cache_size: int = 10000
+    token_cache_ttl: int = 60
+    token_epoch_sync_interval: float = 1
+    scope_cache_size: int = 10000
+    scope_cache_ttl: int = 60
+    revocation_index_size: int = 100000
+
+    @field_validator("private_key", "public_key")
+    @classmethod
+    def resolve_key_path(cls, v: str | None) -> str | None:
+        return _resolve_key_path(v)
+
+
+# 密码哈希配置
+class HasherCfg(BaseModel):
+    max_workers: int
 
 
 # 管理员配置
@@ -70,14 +128,26 @@ class Cfg(BaseModel):
     db: DBCfg
     log: LogCfg
     auth: AuthCfg
+    hasher: HasherCfg
     admin: AdminCfg
     email: EmailCfg
     cors_origins: list[str]
 
 
 CONFIG_DIR = Path(__file__).parent.parent / "configs"  # 配置文件目录
-dotenv.load_dotenv(CONFIG_DIR / ".env")  # 加载 .env
-base_cfg = OmegaConf.load(CONFIG_DIR / "config.yml")  # 加载 config.yml
+CONFIG_FILES = [CONFIG_DIR / ".env", CONFIG_DIR / "config.yml"]  # 配置文件列表
+
+
+def load_cfg(reload: bool = False) -> Cfg:
+    """加载配置
+
+    Args:
+        reload: 是否为运行期间重新加载，重新加载时 .env 中的值覆盖已有环境变量
+    """
+    dotenv.load_dotenv(CONFIG_DIR / ".env", override=reload)  # 加载 .env
+    base_cfg = OmegaConf.load(CONFIG_DIR / "config.yml")  # 加载 config.yml
+    OmegaConf.resolve(base_cfg)  # 解析插值
+    return Cfg.model_validate(base_cfg)  # 转换为配置类
+
 
-OmegaConf.resolve(base_cfg)  # 解析插值
-CFG = Cfg.model_validate(base_cfg)  # 转换为配置类
+CFG = load_cfg()
@@ -11,8 +11,8 @@ class Base(DeclarativeBase):
 class EmailCode(Base):
     __tablename__ = 'email_code'
     __table_args__ = (
-        Index('idx_email_code_email', 'email'),
-        Index('idx_email_code_expire_at', 'expire_at')
+        Index('idx_email_code_expire_at', 'expire_at'),
+        Index('idx_email_code_lookup', 'email', 'type', 'used', 'expire_at')
     )
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -48,6 +48,24 @@ class Scope(Base):
     group: Mapped[list['Group']] = relationship('Group', secondary='group_scope_rel', back_populates='scope')
 
 
+class TableVersion(Base):
+    __tablename__ = 'table_version'
+
+    name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text('0'))
+
+
+class TokenEpoch(Base):
+    __tablename__ = 'token_epoch'
+    __table_args__ = (
+        Index('idx_token_epoch_update_at', 'update_at'),
+    )
+
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    epoch: Mapped[int] = mapped_column(Integer, nullable=False, server_default=text('0'))
+    update_at: Mapped[datetime.datetime] = mapped_column(DateTime, nullable=False, server_default=text('CURRENT_TIMESTAMP'))
+
+
 class User(Base):
     __tablename__ = 'user'
 
@@ -63,17 +81,29 @@ class User(Base):
     refresh_token: Mapped[list['RefreshToken']] = relationship('RefreshToken', back_populates='user')
 
 
+class UserScope(Base):
+    __tablename__ = 'user_scope'
+    __table_args__ = (
+        Index('idx_user_scope_scope_id', 'scope_id'),
+    )
+
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    scope_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+
 t_group_scope_rel = Table(
     'group_scope_rel', Base.metadata,
     Column('group_id', ForeignKey('group.id'), primary_key=True),
-    Column('scope_id', ForeignKey('scope.id'), primary_key=True)
+    Column('scope_id', ForeignKey('scope.id'), primary_key=True),
+    Index('idx_group_scope_rel_scope_id', 'scope_id')
 )
 
 
 t_group_user_rel = Table(
     'group_user_rel', Base.metadata,
     Column('group_id', ForeignKey('group.id'), primary_key=True),
-    Column('user_id', ForeignKey('user.id'), primary_key=True)
+    Column('user_id', ForeignKey('user.id'), primary_key=True),
+    Index('idx_group_user_rel_user_id', 'user_id')
 )
 
 
@@ -64,3 +64,8 @@ class BadRequestError(AppError):
     code = 1600
     message = "请求参数错误"
     status_code = status.HTTP_400_BAD_REQUEST
+
+
+class InvalidCursorError(BadRequestError):
+    code = 1601
+    message = "无效的分页游标"
@@ -5,6 +5,7 @@ from fastapi.responses import JSONResponse
 from app.exceptions.base import AppError
 from app.utils.context import trace_id_ctx
 from app.utils.log import logger
+from app.utils.response import FastJSONResponse
 
 
 def _build_response(
@@ -17,7 +18,7 @@ def _build_response(
     trace_id = trace_id_ctx.get()
     if trace_id:
         payload["trace_id"] = trace_id
-    return JSONResponse(status_code=status_code, content=payload)
+    return FastJSONResponse(status_code=status_code, content=payload)
 
 
 def app_error_handler(request: Request, exc: AppError) -> JSONResponse:
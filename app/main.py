@@ -1,3 +1,4 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 import sqlalchemy.exc
@@ -12,8 +13,10 @@ from app.repositories import group as group_repo
 from app.repositories import relation as relation_repo
 from app.repositories import scope as scope_repo
 from app.repositories import user as user_repo
-from app.routers import api
-from app.utils import db
+from app.repositories import user_scope as user_scope_repo
+from app.routers import api, well_known
+from app.services import token as token_service
+from app.utils import db, hasher
 from app.utils.log import logger, setup_logger
 
 
@@ -61,12 +64,16 @@ async def create_admin_user():
                 logger.info(f"Created admin user: {admin_user.email}")
             elif "admin" not in [g.name for g in admin_user.group]:
                 admin_user.name = CFG.admin.username
-                admin_user.password_hash = user_repo.passwd_hash.hash(
+                admin_user.password_hash = await hasher.hash_password(
                     CFG.admin.password
                 )
                 admin_user.group = [admin_group]
-                await db_session.commit()
+                await db.commit(db_session)
                 logger.info(f"Updated admin user: {admin_user.email}")
+
+            # 以上直接修改了关联关系，重新计算管理员的有效权限
+            await user_scope_repo.refresh_users(db_session, [admin_user.id])
+            await db.commit(db_session)
     except sqlalchemy.exc.OperationalError as e:
         logger.exception("操作失败，请先初始化数据库")
         raise e
@@ -81,12 +88,22 @@ async def lifespan(app: FastAPI):
     # 创建管理员用户
     await create_admin_user()
 
+    # 后台同步用户令牌代数
+    epoch_sync_task = asyncio.create_task(token_service.sync_token_epochs())
+
     yield
 
+    # 停止同步令牌代数
+    epoch_sync_task.cancel()
+
     # 关闭数据库引擎
     await db.close_all()
 
+    # 关闭密码哈希进程池
+    hasher.shutdown()
+
 
+# 不设置 default_response_class，保留按返回类型直接序列化为 JSON 字节的快速路径
 app = FastAPI(lifespan=lifespan)
 
 # 日志中间件
@@ -105,12 +122,13 @@ register_exception_handlers(app)
 
 
 @app.get("/health")
-async def health():
+async def health() -> dict[str, str]:
     return {"status": "healthy"}
 
 
 # 添加路由
 app.include_router(api.router)
+app.include_router(well_known.router)
 
 if __name__ == "__main__":
     import uvicorn
@@ -4,6 +4,7 @@ from typing import Callable
 
 from fastapi import Request, Response
 
+from app.config import CFG
 from app.utils.context import (
     client_ip_ctx,
     method_ctx,
@@ -15,6 +16,8 @@ from app.utils.context import (
 )
 from app.utils.log import logger
 
+QUIET_PATHS = set(CFG.log.quiet_paths)  # 不记录请求日志的路径
+
 
 def _get_client_ip(request: Request) -> str:
     """获取 IP 地址"""
@@ -38,11 +41,13 @@ async def middleware(request: Request, call_next: Callable) -> Response:
     method_ctx.set(request.method)
     path_ctx.set(request.url.path)
 
+    quiet = request.url.path in QUIET_PATHS
     start_time = time.time()
     error = None
     try:
         status_ctx.set("start")  # 设置 status 到 ContextVar
-        logger.info("Request incoming")
+        if not quiet:
+            logger.info("Request incoming")
         status_ctx.set("processing")  # 设置 status 到 ContextVar
         response = await call_next(request)  # 执行请求
     except Exception as e:
@@ -56,7 +61,8 @@ async def middleware(request: Request, call_next: Callable) -> Response:
             status_ctx.set("fail")  # 设置 status 到 ContextVar
         else:
             status_ctx.set("finish")  # 设置 status 到 ContextVar
-            logger.info("Request completed")
+            if not quiet:
+                logger.info("Request completed")
 
     # 添加请求ID和追踪ID到响应头
     response.headers["X-Request-ID"] = request_id
@@ -0,0 +1,16 @@
+"""展示信息查询列
+
+列表和详情展示只按列查询为轻量的行元组，不构造 ORM 对象。各数据访问模块共用
+同一组列定义，保证同一实体在不同接口返回的字段一致
+"""
+
+from app.entities.auth import Group, Scope, User
+
+# 用户展示列（不含密码哈希）
+USER_INFO = (User.id, User.email, User.name, User.yn, User.create_at)
+
+# 组展示列
+GROUP_INFO = (Group.id, Group.name, Group.yn, Group.create_at)
+
+# 权限展示列
+SCOPE_INFO = (Scope.id, Scope.name, Scope.description, Scope.yn, Scope.create_at)
@@ -0,0 +1,69 @@
+"""列表总数统计
+
+按配置 db.count_strategy 统计分页列表的总数：
+- exact: 每次执行 count(*)
+- cached: 按 (表, 关键字) 缓存 count(*) 结果 db.count_cache_ttl 秒
+- estimated: 无搜索条件时从表统计信息估算（MySQL information_schema.TABLES，
+  SQLite 无行数统计，取自增主键最大值），有搜索条件时同 cached
+"""
+
+from typing import NamedTuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import CFG
+from app.utils.cache import TTLCache
+
+_CACHE = TTLCache("count_cache", 1024, CFG.db.count_cache_ttl)
+
+
+class Total(NamedTuple):
+    """列表总数"""
+
+    value: int  # 总数
+    exact: bool  # 是否为当前的精确值（缓存或估算时为 False）
+
+
+async def _estimate(db_session: AsyncSession, entity) -> int:
+    """从表统计信息估算行数"""
+    if db_session.bind.dialect.name == "mysql":
+        stmt = text(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES"
+            " WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :name"
+        ).bindparams(name=entity.__tablename__)
+    else:
+        # 按主键索引取最大值，删除过记录时偏大
+        stmt = select(func.max(entity.id))
+    return (await db_session.execute(stmt)).scalar() or 0
+
+
+async def count(
+    db_session: AsyncSession, entity, keyword: str | None = None, where=None
+) -> Total:
+    """按配置的策略统计列表总数
+
+    Args:
+        db_session: 数据库会话
+        entity: 实体类
+        keyword: 搜索关键字，作为缓存键的一部分
+        where: 与 keyword 对应的过滤条件，为 None 则统计全表
+
+    Returns:
+        列表总数
+    """
+    strategy = CFG.db.count_strategy
+    if strategy == "estimated" and where is None:
+        return Total(await _estimate(db_session, entity), False)
+    key = (entity.__tablename__, keyword)
+    if strategy != "exact":
+        cached = _CACHE.get(key)
+        if cached is not None:
+            return Total(cached, False)
+    stmt = select(func.count()).select_from(entity)
+    if where is not None:
+        stmt = stmt.where(where)
+    value = (await db_session.execute(stmt)).scalar() or 0
+    if strategy != "exact":
+        _CACHE.set(key, value)
+    return Total(value, True)
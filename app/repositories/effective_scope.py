@@ -0,0 +1,52 @@
+"""用户有效权限缓存
+
+有效权限为用户所在的已启用组所拥有的已启用权限名称，从 user_scope 物化表读取，
+按用户 ID 缓存在进程内。关联关系、组、权限发生变更时由对应的数据访问函数失效缓存；
+其他进程的变更在缓存过期（auth.scope_cache_ttl）后生效
+"""
+
+from collections.abc import Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import CFG
+from app.repositories import user_scope
+from app.utils.cache import TTLCache
+
+_CACHE = TTLCache("scope_cache", CFG.auth.scope_cache_size, CFG.auth.scope_cache_ttl)
+_VERSION = 0  # 失效次数，查询期间发生失效时不写入缓存，避免覆盖为旧数据
+
+
+async def get(db_session: AsyncSession, user_id: int) -> list[str]:
+    """获取用户有效权限名称列表（优先使用缓存）
+
+    Args:
+        db_session: 数据库会话
+        user_id: 用户 ID
+
+    Returns:
+        去重后的权限名称列表
+    """
+    scopes = _CACHE.get(user_id)
+    if scopes is not None:
+        return list(scopes)
+    version = _VERSION
+    scopes = tuple(await user_scope.get_scope_names(db_session, user_id))
+    if version == _VERSION:
+        _CACHE.set(user_id, scopes)
+    return list(scopes)
+
+
+def invalidate(user_ids: Iterable[int] | None = None) -> None:
+    """失效用户有效权限缓存
+
+    Args:
+        user_ids: 需要失效的用户 ID，为 None 则失效全部用户（组或权限变更时）
+    """
+    global _VERSION
+    _VERSION += 1
+    if user_ids is None:
+        _CACHE.clear()
+        return
+    for user_id in user_ids:
+        _CACHE.pop(user_id)
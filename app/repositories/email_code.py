@@ -6,6 +6,7 @@ from sqlalchemy import and_, desc, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.entities.auth import EmailCode
+from app.utils import db
 
 
 async def create(
@@ -34,26 +35,14 @@ async def create(
         expire_at=expire_at,
     )
     db_session.add(email_code)
-    await db_session.commit()
-    await db_session.refresh(email_code)
+    await db.commit(db_session)
     return email_code
 
 
-async def get_latest(
-    db_session: AsyncSession, email: str, code_type: str
-) -> EmailCode | None:
-    """获取该邮箱该类型最新的未使用且未过期的验证码
-
-    Args:
-        db_session: 数据库会话
-        email: 邮箱地址
-        code_type: 验证码类型
-
-    Returns:
-        最新的有效验证码，不存在则返回 None
-    """
-    stmt = (
-        select(EmailCode)
+def _latest_stmt(email: str, code_type: str):
+    """查询该邮箱该类型最新的未使用且未过期的验证码"""
+    return (
+        select(EmailCode.id, EmailCode.code, EmailCode.create_at)
         .where(
             and_(
                 EmailCode.email == email,
@@ -62,25 +51,14 @@ async def get_latest(
                 EmailCode.expire_at > datetime.now(),
             )
         )
-        .order_by(desc(EmailCode.create_at))
+        .order_by(desc(EmailCode.create_at), desc(EmailCode.id))
         .limit(1)
     )
-    result = await db_session.execute(stmt)
-    return result.scalar_one_or_none()
-
 
-async def revoke_all(
-    db_session: AsyncSession, email: str, code_type: str, before: datetime
-) -> None:
-    """撤销该邮箱该类型下指定时间之前所有未使用的验证码
 
-    Args:
-        db_session: 数据库会话
-        email: 邮箱地址
-        code_type: 验证码类型
-        before: 作废该时间戳之前（含）创建的所有验证码
-    """
-    stmt = (
+def _revoke_stmt(email: str, code_type: str, before):
+    """作废该邮箱该类型下指定时间之前（含）创建的所有未使用验证码"""
+    return (
         update(EmailCode)
         .where(
             and_(
@@ -92,5 +70,37 @@ async def revoke_all(
         )
         .values(used=1)
     )
-    await db_session.execute(stmt)
-    await db_session.commit()
+
+
+async def consume(
+    db_session: AsyncSession, email: str, code: str, code_type: str
+) -> bool:
+    """校验并消费验证码
+
+    最新的有效验证码与提交的验证码一致时，作废该验证码及之前的所有验证码。
+    SQLite 用一条条件 UPDATE 同时完成校验和作废；MySQL 不允许 UPDATE 的子查询
+    引用自身表，先加锁读取最新验证码再更新。并发提交同一验证码时只有一次成功
+
+    Args:
+        db_session: 数据库会话
+        email: 邮箱地址
+        code: 提交的验证码
+        code_type: 验证码类型
+
+    Returns:
+        是否校验成功
+    """
+    if db_session.bind.dialect.name == "mysql":
+        stmt = _latest_stmt(email, code_type).with_for_update()
+        latest = (await db_session.execute(stmt)).first()
+        if latest is None or latest.code != code:
+            return False
+        before = latest.create_at
+    else:
+        latest = _latest_stmt(email, code_type).subquery()
+        before = (
+            select(latest.c.create_at).where(latest.c.code == code).scalar_subquery()
+        )
+    result = await db_session.execute(_revoke_stmt(email, code_type, before))
+    await db.commit(db_session)
+    return result.rowcount > 0
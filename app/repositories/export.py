@@ -0,0 +1,52 @@
+"""数据导出
+
+使用服务端游标（AsyncSession.stream + yield_per）按主键顺序分批读取整表，
+内存占用与表大小无关
+"""
+
+from collections.abc import AsyncIterator
+from typing import Literal
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.entities.auth import Group, Scope, User, t_group_scope_rel, t_group_user_rel
+
+BATCH_SIZE = 1000  # 每批从游标读取的行数
+
+Resource = Literal["users", "groups", "scopes", "user_groups", "group_scopes"]
+
+_COLUMNS = {
+    "users": (
+        User.id,
+        User.email,
+        User.name.label("username"),
+        User.yn,
+        User.create_at,
+    ),
+    "groups": (Group.id, Group.name, Group.yn, Group.create_at),
+    "scopes": (Scope.id, Scope.name, Scope.description, Scope.yn, Scope.create_at),
+    "user_groups": (t_group_user_rel.c.user_id, t_group_user_rel.c.group_id),
+    "group_scopes": (t_group_scope_rel.c.group_id, t_group_scope_rel.c.scope_id),
+}  # 导出的列（不含密码哈希），按前两列排序
+
+
+async def stream(
+    db_session: AsyncSession, resource: Resource
+) -> AsyncIterator[list[dict]]:
+    """分批流式读取整表
+
+    Args:
+        db_session: 数据库会话，需在迭代结束前保持打开
+        resource: 导出的数据类型（用户、组、权限、用户-组关联、组-权限关联）
+
+    Yields:
+        每批最多 BATCH_SIZE 行，每行为列名到值的字典
+    """
+    columns = _COLUMNS[resource]
+    stmt = (
+        select(*columns).order_by(*columns[:2]).execution_options(yield_per=BATCH_SIZE)
+    )
+    result = await db_session.stream(stmt)
+    async for partition in result.mappings().partitions():
+        yield [dict(row) for row in partition]
@@ -1,10 +1,12 @@
 """组数据访问"""
 
-from sqlalchemy import delete, func, select
+from sqlalchemy import Row, delete, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.entities.auth import Group
+from app.entities.auth import Group, User, t_group_scope_rel, t_group_user_rel
+from app.repositories import columns, count, effective_scope, search, user_scope
+from app.utils import db
 
 
 async def _execute_with_scope(db_session: AsyncSession, stmt) -> Group | None:
@@ -46,6 +48,58 @@ async def get_by_id(db_session: AsyncSession, group_id: int) -> Group | None:
     return result.scalar_one_or_none()
 
 
+async def get_info(db_session: AsyncSession, group_id: int) -> Row | None:
+    """通过 ID 获取组展示信息
+
+    Args:
+        db_session: 数据库会话
+        group_id: 组 ID
+
+    Returns:
+        组信息行（列见 columns.GROUP_INFO），不存在则返回 None
+    """
+    stmt = select(*columns.GROUP_INFO).where(Group.id == group_id)
+    return (await db_session.execute(stmt)).first()
+
+
+async def get_infos_by_user(db_session: AsyncSession, user_id: int) -> list[Row]:
+    """获取用户所属组的展示信息
+
+    Args:
+        db_session: 数据库会话
+        user_id: 用户 ID
+
+    Returns:
+        组信息行列表（列见 columns.GROUP_INFO），按组 ID 排序
+    """
+    stmt = (
+        select(*columns.GROUP_INFO)
+        .join(t_group_user_rel, t_group_user_rel.c.group_id == Group.id)
+        .where(t_group_user_rel.c.user_id == user_id)
+        .order_by(Group.id)
+    )
+    return list((await db_session.execute(stmt)).all())
+
+
+async def get_infos_by_scope(db_session: AsyncSession, scope_id: int) -> list[Row]:
+    """获取拥有权限的组的展示信息
+
+    Args:
+        db_session: 数据库会话
+        scope_id: 权限 ID
+
+    Returns:
+        组信息行列表（列见 columns.GROUP_INFO），按组 ID 排序
+    """
+    stmt = (
+        select(*columns.GROUP_INFO)
+        .join(t_group_scope_rel, t_group_scope_rel.c.group_id == Group.id)
+        .where(t_group_scope_rel.c.scope_id == scope_id)
+        .order_by(Group.id)
+    )
+    return list((await db_session.execute(stmt)).all())
+
+
 async def get_by_id_with_scope(db_session: AsyncSession, group_id: int) -> Group | None:
     """通过 ID 获取组（预加载权限）
 
@@ -90,6 +144,46 @@ async def get_by_id_with_user_scope(
     return await _execute_with_user_scope(db_session, stmt)
 
 
+async def ls_users(
+    db_session: AsyncSession, group_id: int, limit: int, before_id: int | None = None
+) -> list[Row]:
+    """分页获取组内用户（按用户 ID 倒序，走 group_user_rel 主键索引）
+
+    Args:
+        db_session: 数据库会话
+        group_id: 组 ID
+        limit: 每页返回数量
+        before_id: 游标分页，只返回 ID 小于该值的用户
+
+    Returns:
+        用户信息行列表（列见 columns.USER_INFO）
+    """
+    stmt = (
+        select(*columns.USER_INFO)
+        .join(t_group_user_rel, t_group_user_rel.c.user_id == User.id)
+        .where(t_group_user_rel.c.group_id == group_id)
+    )
+    if before_id is not None:
+        stmt = stmt.where(t_group_user_rel.c.user_id < before_id)
+    stmt = stmt.order_by(t_group_user_rel.c.user_id.desc()).limit(limit)
+    result = await db_session.execute(stmt)
+    return list(result.all())
+
+
+async def count_users(db_session: AsyncSession, group_id: int) -> int:
+    """统计组内用户数
+
+    Args:
+        db_session: 数据库会话
+        group_id: 组 ID
+
+    Returns:
+        用户数
+    """
+    stmt = select(func.count()).where(t_group_user_rel.c.group_id == group_id)
+    return (await db_session.execute(stmt)).scalar() or 0
+
+
 async def get_by_name(db_session: AsyncSession, name: str) -> Group | None:
     """通过名称获取组
 
@@ -182,8 +276,7 @@ async def create(db_session: AsyncSession, name: str) -> Group:
     """
     group = Group(name=name)
     db_session.add(group)
-    await db_session.commit()
-    await db_session.refresh(group)
+    await db.commit(db_session)
     return group
 
 
@@ -207,7 +300,12 @@ async def update(
         group.name = name
     if yn is not None:
         group.yn = yn
-    await db_session.commit()
+        # 组启用状态影响组内用户的有效权限
+        user_ids = await user_scope.get_user_ids_by_groups(db_session, [group.id])
+        await user_scope.refresh_users(db_session, user_ids)
+    await db.commit(db_session)
+    if yn is not None:
+        db.after_commit(db_session, effective_scope.invalidate)
 
 
 async def remove(db_session: AsyncSession, group_id: int) -> None:
@@ -217,36 +315,46 @@ async def remove(db_session: AsyncSession, group_id: int) -> None:
         db_session: 数据库会话
         group_id: 要删除的组 ID
     """
+    user_ids = await user_scope.get_user_ids_by_groups(db_session, [group_id])
     stmt = delete(Group).where(Group.id == group_id)
     await db_session.execute(stmt)
-    await db_session.commit()
+    await user_scope.refresh_users(db_session, user_ids)
+    await db.commit(db_session)
+    db.after_commit(db_session, effective_scope.invalidate)
 
 
 async def ls(
-    db_session: AsyncSession, offset: int, limit: int, keyword: str | None = None
-) -> tuple[list[Group], int]:
+    db_session: AsyncSession,
+    offset: int,
+    limit: int,
+    keyword: str | None = None,
+    before_id: int | None = None,
+) -> tuple[list[Row], count.Total]:
     """获取组列表
 
     Returns:
-        (组列表, 总数)
+        (组信息行列表（列见 columns.GROUP_INFO）, 总数及是否精确)
     """
     # 构建基础查询
-    base_stmt = select(Group)
-    count_stmt = select(func.count()).select_from(Group)
+    base_stmt = select(*columns.GROUP_INFO)
+    filter_cond = None
 
     # 添加搜索条件
     if keyword:
-        filter_cond = Group.name.contains(keyword)
+        filter_cond = search.match(db_session, Group, [Group.name], keyword)
         base_stmt = base_stmt.where(filter_cond)
-        count_stmt = count_stmt.where(filter_cond)
 
     # 执行查询
-    stmt = base_stmt.offset(offset).limit(limit).order_by(Group.id.desc())
+    if before_id is not None:
+        # 游标分页：从上一页最后一条记录之后开始，不再跳过 offset 行
+        stmt = base_stmt.where(Group.id < before_id)
+    else:
+        stmt = base_stmt.offset(offset)
+    stmt = stmt.limit(limit).order_by(Group.id.desc())
     result = await db_session.execute(stmt)
-    groups = result.scalars().all()
+    groups = result.all()
 
     # 获取总数
-    total_result = await db_session.execute(count_stmt)
-    total = total_result.scalar() or 0
+    total = await count.count(db_session, Group, keyword, filter_cond)
 
     return list(groups), total
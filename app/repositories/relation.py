@@ -1,9 +1,49 @@
-"""关联操作"""
+"""关联操作
 
-from sqlalchemy import delete, insert, or_, select
+关联按主键对分批写入：添加使用方言的冲突忽略插入（SQLite ON CONFLICT DO NOTHING，
+MySQL ON DUPLICATE KEY UPDATE），删除使用 (a, b) IN ((?, ?), ...) 元组条件，
+每批参数数量固定，不受 SQLite 变量数上限影响
+"""
+
+from sqlalchemy import Table, delete, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.entities.auth import t_group_scope_rel, t_group_user_rel
+from app.repositories import effective_scope, user_scope
+from app.utils import db
+
+CHUNK_SIZE = 400  # 每批写入的关联数（每个关联两个参数）
+
+
+def _chunks(pairs: list[tuple[int, int]], size: int = CHUNK_SIZE):
+    """将关联去重后分批"""
+    pairs = list(dict.fromkeys(pairs))
+    for i in range(0, len(pairs), size):
+        yield pairs[i : i + size]
+
+
+async def _add(
+    db_session: AsyncSession, table: Table, keys: tuple[str, str], pairs
+) -> None:
+    """分批插入关联，已存在的关联忽略"""
+    for chunk in _chunks(pairs):
+        stmt = db.insert(db_session, table).values(
+            [dict(zip(keys, pair)) for pair in chunk]
+        )
+        if db_session.bind.dialect.name == "mysql":
+            stmt = stmt.on_duplicate_key_update({keys[0]: stmt.inserted[keys[0]]})
+        else:
+            stmt = stmt.on_conflict_do_nothing()
+        await db_session.execute(stmt)
+
+
+async def _remove(
+    db_session: AsyncSession, table: Table, keys: tuple[str, str], pairs
+) -> None:
+    """分批删除关联，不存在的关联忽略"""
+    columns = tuple_(table.c[keys[0]], table.c[keys[1]])
+    for chunk in _chunks(pairs):
+        await db_session.execute(delete(table).where(columns.in_(chunk)))
 
 
 async def add_user_group(
@@ -17,31 +57,14 @@ async def add_user_group(
     """
     if not user_group_id_tuples:
         return
-    # 去重
-    unique_tuples = list(set(user_group_id_tuples))
-    # 查询已存在的关联
-    stmt = select(t_group_user_rel.c.user_id, t_group_user_rel.c.group_id).where(
-        or_(
-            *[
-                (t_group_user_rel.c.user_id == user_id)
-                & (t_group_user_rel.c.group_id == group_id)
-                for user_id, group_id in unique_tuples
-            ]
-        )
+    await _add(
+        db_session, t_group_user_rel, ("user_id", "group_id"), user_group_id_tuples
     )
-    result = await db_session.execute(stmt)
-    existing = set(result.all())
-    # 过滤掉已存在的
-    to_insert = [
-        {"user_id": user_id, "group_id": group_id}
-        for user_id, group_id in unique_tuples
-        if (user_id, group_id) not in existing
-    ]
-    if not to_insert:
-        return
-    stmt = insert(t_group_user_rel).values(to_insert)
-    result = await db_session.execute(stmt)
-    await db_session.commit()
+    # 重新计算受影响用户的有效权限
+    user_ids = list({user_id for user_id, _ in user_group_id_tuples})
+    await user_scope.refresh_users(db_session, user_ids)
+    await db.commit(db_session)
+    db.after_commit(db_session, lambda: effective_scope.invalidate(user_ids))
 
 
 async def remove_user_group(
@@ -55,37 +78,14 @@ async def remove_user_group(
     """
     if not user_group_id_tuples:
         return
-    # 去重
-    unique_tuples = list(set(user_group_id_tuples))
-    # 查询存在的关联
-    stmt = select(t_group_user_rel.c.user_id, t_group_user_rel.c.group_id).where(
-        or_(
-            *[
-                (t_group_user_rel.c.user_id == user_id)
-                & (t_group_user_rel.c.group_id == group_id)
-                for user_id, group_id in unique_tuples
-            ]
-        )
+    await _remove(
+        db_session, t_group_user_rel, ("user_id", "group_id"), user_group_id_tuples
     )
-    result = await db_session.execute(stmt)
-    existing = set(result.all())
-    # 过滤掉不存在的
-    to_delete = [
-        (user_id, group_id)
-        for user_id, group_id in unique_tuples
-        if (user_id, group_id) in existing
-    ]
-    if not to_delete:
-        return
-    # 删除存在的关联
-    conditions = [
-        (t_group_user_rel.c.user_id == user_id)
-        & (t_group_user_rel.c.group_id == group_id)
-        for user_id, group_id in to_delete
-    ]
-    stmt = delete(t_group_user_rel).where(or_(*conditions))
-    await db_session.execute(stmt)
-    await db_session.commit()
+    # 重新计算受影响用户的有效权限
+    user_ids = list({user_id for user_id, _ in user_group_id_tuples})
+    await user_scope.refresh_users(db_session, user_ids)
+    await db.commit(db_session)
+    db.after_commit(db_session, lambda: effective_scope.invalidate(user_ids))
 
 
 async def add_group_scope(
@@ -99,31 +99,16 @@ async def add_group_scope(
     """
     if not group_scope_id_tuples:
         return
-    # 去重
-    unique_tuples = list(set(group_scope_id_tuples))
-    # 查询已存在的关联
-    stmt = select(t_group_scope_rel.c.group_id, t_group_scope_rel.c.scope_id).where(
-        or_(
-            *[
-                (t_group_scope_rel.c.group_id == group_id)
-                & (t_group_scope_rel.c.scope_id == scope_id)
-                for group_id, scope_id in unique_tuples
-            ]
-        )
+    await _add(
+        db_session, t_group_scope_rel, ("group_id", "scope_id"), group_scope_id_tuples
     )
-    result = await db_session.execute(stmt)
-    existing = set(result.all())
-    # 过滤掉已存在的
-    to_insert = [
-        {"group_id": group_id, "scope_id": scope_id}
-        for group_id, scope_id in unique_tuples
-        if (group_id, scope_id) not in existing
-    ]
-    if not to_insert:
-        return
-    stmt = insert(t_group_scope_rel).values(to_insert)
-    result = await db_session.execute(stmt)
-    await db_session.commit()
+    # 重新计算组内用户的有效权限
+    user_ids = await user_scope.get_user_ids_by_groups(
+        db_session, (group_id for group_id, _ in group_scope_id_tuples)
+    )
+    await user_scope.refresh_users(db_session, user_ids)
+    await db.commit(db_session)
+    db.after_commit(db_session, lambda: effective_scope.invalidate(user_ids))
 
 
 async def remove_group_scope(
@@ -137,34 +122,13 @@ async def remove_group_scope(
     """
     if not group_scope_id_tuples:
         return
-    # 去重
-    unique_tuples = list(set(group_scope_id_tuples))
-    # 查询存在的关联
-    stmt = select(t_group_scope_rel.c.group_id, t_group_scope_rel.c.scope_id).where(
-        or_(
-            *[
-                (t_group_scope_rel.c.group_id == group_id)
-                & (t_group_scope_rel.c.scope_id == scope_id)
-                for group_id, scope_id in unique_tuples
-            ]
-        )
+    await _remove(
+        db_session, t_group_scope_rel, ("group_id", "scope_id"), group_scope_id_tuples
     )
-    result = await db_session.execute(stmt)
-    existing = set(result.all())
-    # 过滤掉不存在的
-    to_delete = [
-        (group_id, scope_id)
-        for group_id, scope_id in unique_tuples
-        if (group_id, scope_id) in existing
-    ]
-    if not to_delete:
-        return
-    # 删除存在的关联
-    conditions = [
-        (t_group_scope_rel.c.group_id == group_id)
-        & (t_group_scope_rel.c.scope_id == scope_id)
-        for group_id, scope_id in to_delete
-    ]
-    stmt = delete(t_group_scope_rel).where(or_(*conditions))
-    await db_session.execute(stmt)
-    await db_session.commit()
+    # 重新计算组内用户的有效权限
+    user_ids = await user_scope.get_user_ids_by_groups(
+        db_session, (group_id for group_id, _ in group_scope_id_tuples)
+    )
+    await user_scope.refresh_users(db_session, user_ids)
+    await db.commit(db_session)
+    db.after_commit(db_session, lambda: effective_scope.invalidate(user_ids))
@@ -1,10 +1,12 @@
 """权限数据访问"""
 
-from sqlalchemy import delete, func, select
+from sqlalchemy import Row, delete, func, select, union
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.entities.auth import Group, Scope
+from app.entities.auth import Group, Scope, User, t_group_scope_rel, t_group_user_rel
+from app.repositories import columns, count, effective_scope, search, user_scope
+from app.utils import db
 
 
 async def _execute_with_group(db_session: AsyncSession, stmt) -> Scope | None:
@@ -36,6 +38,39 @@ async def get_by_id(db_session: AsyncSession, scope_id: int) -> Scope | None:
     return result.scalar_one_or_none()
 
 
+async def get_info(db_session: AsyncSession, scope_id: int) -> Row | None:
+    """通过 ID 获取权限展示信息
+
+    Args:
+        db_session: 数据库会话
+        scope_id: 权限 ID
+
+    Returns:
+        权限信息行（列见 columns.SCOPE_INFO），不存在则返回 None
+    """
+    stmt = select(*columns.SCOPE_INFO).where(Scope.id == scope_id)
+    return (await db_session.execute(stmt)).first()
+
+
+async def get_infos_by_group(db_session: AsyncSession, group_id: int) -> list[Row]:
+    """获取组权限的展示信息
+
+    Args:
+        db_session: 数据库会话
+        group_id: 组 ID
+
+    Returns:
+        权限信息行列表（列见 columns.SCOPE_INFO），按权限 ID 排序
+    """
+    stmt = (
+        select(*columns.SCOPE_INFO)
+        .join(t_group_scope_rel, t_group_scope_rel.c.scope_id == Scope.id)
+        .where(t_group_scope_rel.c.group_id == group_id)
+        .order_by(Scope.id)
+    )
+    return list((await db_session.execute(stmt)).all())
+
+
 async def get_by_id_with_group(db_session: AsyncSession, scope_id: int) -> Scope | None:
     """通过 ID 获取权限（预加载组）
 
@@ -66,6 +101,81 @@ async def get_by_id_with_group_user(
     return await _execute_with_group_user(db_session, stmt)
 
 
+def _holder_ids_stmt(scope_id: int):
+    """查询经由任意组拥有权限的用户 ID（去重）"""
+    return (
+        select(t_group_user_rel.c.user_id)
+        .join(
+            t_group_scope_rel,
+            t_group_scope_rel.c.group_id == t_group_user_rel.c.group_id,
+        )
+        .where(t_group_scope_rel.c.scope_id == scope_id)
+        .distinct()
+    )
+
+
+async def ls_users(
+    db_session: AsyncSession, scope_id: int, limit: int, before_id: int | None = None
+) -> list[Row]:
+    """分页获取经由任意组拥有权限的用户（按用户 ID 倒序）
+
+    每个拥有权限的组按 group_user_rel 主键 (group_id, user_id) 倒序各取一页，
+    合并去重后再取一页，每页读取的关联记录数为 组数 × limit，与拥有权限的用户总数无关
+
+    Args:
+        db_session: 数据库会话
+        scope_id: 权限 ID
+        limit: 每页返回数量
+        before_id: 游标分页，只返回 ID 小于该值的用户
+
+    Returns:
+        用户信息行列表（列见 columns.USER_INFO）（已去重）
+    """
+    stmt = select(t_group_scope_rel.c.group_id).where(
+        t_group_scope_rel.c.scope_id == scope_id
+    )
+    group_ids = (await db_session.execute(stmt)).scalars().all()
+    if not group_ids:
+        return []
+    ranges = []
+    for group_id in group_ids:
+        stmt = select(t_group_user_rel.c.user_id).where(
+            t_group_user_rel.c.group_id == group_id
+        )
+        if before_id is not None:
+            stmt = stmt.where(t_group_user_rel.c.user_id < before_id)
+        stmt = stmt.order_by(t_group_user_rel.c.user_id.desc()).limit(limit)
+        ranges.append(select(stmt.subquery().c.user_id))
+    merged = union(*ranges).subquery()
+    page = (
+        select(merged.c.user_id)
+        .order_by(merged.c.user_id.desc())
+        .limit(limit)
+        .subquery()
+    )
+    stmt = (
+        select(*columns.USER_INFO)
+        .join(page, page.c.user_id == User.id)
+        .order_by(User.id.desc())
+    )
+    result = await db_session.execute(stmt)
+    return list(result.all())
+
+
+async def count_users(db_session: AsyncSession, scope_id: int) -> int:
+    """统计经由任意组拥有权限的用户数
+
+    Args:
+        db_session: 数据库会话
+        scope_id: 权限 ID
+
+    Returns:
+        去重后的用户数
+    """
+    stmt = select(func.count()).select_from(_holder_ids_stmt(scope_id).subquery())
+    return (await db_session.execute(stmt)).scalar() or 0
+
+
 async def get_by_name(db_session: AsyncSession, name: str) -> Scope | None:
     """通过名称获取权限
 
@@ -147,8 +257,7 @@ async def create(
     """
     scope = Scope(name=name, description=description)
     db_session.add(scope)
-    await db_session.commit()
-    await db_session.refresh(scope)
+    await db.commit(db_session)
     return scope
 
 
@@ -176,7 +285,14 @@ async def update(
         scope.description = description
     if yn is not None:
         scope.yn = yn
-    await db_session.commit()
+        # 权限启用状态影响关联用户的有效权限
+        user_ids = await user_scope.get_user_ids_by_scope(db_session, scope.id)
+        await user_scope.refresh_users(db_session, user_ids)
+    await db.commit(db_session)
+    if name is not None or yn is not None:
+        db.after_commit(
+            db_session, effective_scope.invalidate
+        )  # 权限名和启用状态影响用户的有效权限
 
 
 async def remove(db_session: AsyncSession, scope_id: int) -> None:
@@ -186,14 +302,21 @@ async def remove(db_session: AsyncSession, scope_id: int) -> None:
         db_session: 数据库会话
         scope_id: 要删除的权限 ID
     """
+    user_ids = await user_scope.get_user_ids_by_scope(db_session, scope_id)
     stmt = delete(Scope).where(Scope.id == scope_id)
     await db_session.execute(stmt)
-    await db_session.commit()
+    await user_scope.refresh_users(db_session, user_ids)
+    await db.commit(db_session)
+    db.after_commit(db_session, effective_scope.invalidate)
 
 
 async def ls(
-    db_session: AsyncSession, offset: int, limit: int, keyword: str | None = None
-) -> tuple[list[Scope], int]:
+    db_session: AsyncSession,
+    offset: int,
+    limit: int,
+    keyword: str | None = None,
+    before_id: int | None = None,
+) -> tuple[list[Row], count.Total]:
     """获取权限列表（支持分页和搜索）
 
     Args:
@@ -201,29 +324,33 @@ async def ls(
         offset: 分页偏移量，从 0 开始
         limit: 每页返回数量
         keyword: 搜索关键字，会匹配权限名和描述，为 None 则不搜索
+        before_id: 游标分页，只返回 ID 小于该值的记录，传入时忽略 offset
 
     Returns:
-        元组 (权限列表, 总数)
+        元组 (权限信息行列表（列见 columns.SCOPE_INFO）, 总数及是否精确)
     """
     # 构建基础查询
-    base_stmt = select(Scope)
-    count_stmt = select(func.count()).select_from(Scope)
+    base_stmt = select(*columns.SCOPE_INFO)
+    filter_cond = None
 
     # 添加搜索条件
     if keyword:
-        filter_cond = (Scope.name.contains(keyword)) | (
-            Scope.description.contains(keyword)
+        filter_cond = search.match(
+            db_session, Scope, [Scope.name, Scope.description], keyword
         )
         base_stmt = base_stmt.where(filter_cond)
-        count_stmt = count_stmt.where(filter_cond)
 
     # 执行查询
-    stmt = base_stmt.offset(offset).limit(limit).order_by(Scope.id.desc())
+    if before_id is not None:
+        # 游标分页：从上一页最后一条记录之后开始，不再跳过 offset 行
+        stmt = base_stmt.where(Scope.id < before_id)
+    else:
+        stmt = base_stmt.offset(offset)
+    stmt = stmt.limit(limit).order_by(Scope.id.desc())
     result = await db_session.execute(stmt)
-    scopes = result.scalars().all()
+    scopes = result.all()
 
     # 获取总数
-    total_result = await db_session.execute(count_stmt)
-    total = total_result.scalar() or 0
+    total = await count.count(db_session, Scope, keyword, filter_cond)
 
     return list(scopes), total
@@ -0,0 +1,49 @@
+"""关键字搜索条件
+
+按子串匹配用户（用户名、邮箱）、组（组名）、权限（权限名、描述）：
+- SQLite: FTS5 trigram 索引 {表名}_fts，关键字不少于 3 个字符时使用
+- MySQL: ngram 全文索引 ft_{表名}_search，关键字不少于 2 个字符时使用
+索引由数据库触发器或全文索引随写入同步；关键字过短时 trigram/ngram 无法匹配，
+退回 LIKE '%关键字%' 扫描
+"""
+
+from sqlalchemy import ColumnElement, literal_column, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+MIN_KEYWORD_LENGTH = {"sqlite": 3, "mysql": 2}  # 能使用索引的最短关键字
+
+
+def _phrase(keyword: str) -> str:
+    """将关键字转为短语查询，避免被解析为查询语法"""
+    return '"' + keyword.replace('"', '""') + '"'
+
+
+def match(
+    db_session: AsyncSession, entity, columns: list, keyword: str
+) -> ColumnElement[bool]:
+    """构建关键字子串匹配条件
+
+    Args:
+        db_session: 数据库会话
+        entity: 实体类（User、Group、Scope）
+        columns: 搜索的列，需与索引的列一致
+        keyword: 搜索关键字
+
+    Returns:
+        过滤条件
+    """
+    dialect = db_session.bind.dialect.name
+    if len(keyword) < MIN_KEYWORD_LENGTH.get(dialect, len(keyword) + 1):
+        return or_(*(column.contains(keyword) for column in columns))
+    if dialect == "mysql":
+        names = ", ".join(f"`{column.key}`" for column in columns)
+        return text(f"MATCH ({names}) AGAINST (:keyword IN BOOLEAN MODE)").bindparams(
+            keyword=_phrase(keyword)
+        )
+    index = f"`{entity.__tablename__}_fts`"
+    rowids = (
+        select(literal_column("rowid"))
+        .select_from(text(index))
+        .where(text(f"{index} MATCH :keyword").bindparams(keyword=_phrase(keyword)))
+    )
+    return entity.id.in_(rowids)
@@ -0,0 +1,28 @@
+"""表版本号数据访问
+
+table_version 表为 user、group、scope 及两张关联表各保存一个修改计数，由数据库触发器
+在表的每次插入、更新、删除时递增。读接口用相关表的版本号生成 ETag，版本号不变即
+响应内容不变
+"""
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.entities.auth import TableVersion
+
+
+async def get(db_session: AsyncSession, names: list[str]) -> list[int]:
+    """获取表版本号
+
+    Args:
+        db_session: 数据库会话
+        names: 表名列表
+
+    Returns:
+        与输入顺序一致的版本号列表，未跟踪的表为 0
+    """
+    stmt = select(TableVersion.name, TableVersion.version).where(
+        TableVersion.name.in_(names)
+    )
+    versions = dict((await db_session.execute(stmt)).all())
+    return [versions.get(name, 0) for name in names]
@@ -1,11 +1,83 @@
 """刷新令牌数据访问"""
 
+import time
+from collections import OrderedDict
 from datetime import datetime
 
 from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import CFG
 from app.entities.auth import RefreshToken
+from app.repositories import token_epoch as token_epoch_repo
+from app.utils import db
+
+
+class RevocationIndex:
+    """进程内刷新令牌撤销索引
+
+    记录本进程撤销的令牌 jti 以及批量撤销用户令牌的时间点，用于在刷新时
+    判断令牌是否可能已被撤销。未命中索引的令牌无需查询数据库；其他进程
+    撤销的令牌不在索引中，由撤销旧令牌时的条件更新兜底
+
+    记录按撤销时间排序，清理时只从最旧的一端弹出已过期或超出容量的记录。
+    超出容量被丢弃的令牌同样由条件更新兜底
+    """
+
+    def __init__(self, retention: float, max_size: int) -> None:
+        self.retention = retention  # 保留时间（秒），超过后令牌已自然过期
+        self.max_size = max_size  # 每类记录的最大条数
+        self._jtis: OrderedDict[str, float] = OrderedDict()  # jti -> 撤销时间
+        # 用户 ID -> 撤销时间，此前签发的令牌均已撤销
+        self._users: OrderedDict[int, float] = OrderedDict()
+
+    def revoke(self, jti: str) -> None:
+        """记录单个令牌撤销"""
+        self._record(self._jtis, jti)
+
+    def revoke_user(self, user_id: int) -> None:
+        """记录用户此前签发的所有令牌撤销"""
+        self._record(self._users, user_id)
+
+    def maybe_revoked(self, jti: str, user_id: int, iat: float | None) -> bool:
+        """令牌是否可能已被撤销
+
+        Args:
+            jti: JWT 唯一标识符
+            user_id: 关联的用户 ID
+            iat: 签发时间戳，旧令牌没有该字段时视为可能已撤销
+
+        Returns:
+            命中索引或无法判断时返回 True
+        """
+        if jti in self._jtis:
+            return True
+        revoked_at = self._users.get(user_id)
+        if revoked_at is None:
+            return False
+        return iat is None or iat <= revoked_at
+
+    def clear(self) -> None:
+        """清空索引"""
+        self._jtis.clear()
+        self._users.clear()
+
+    def _record(self, data: OrderedDict, key) -> None:
+        """写入撤销记录并清理最旧一端超过保留时间或超出容量的记录"""
+        now = time.time()
+        data[key] = now
+        data.move_to_end(key)
+        deadline = now - self.retention
+        while data:
+            revoked_at = next(iter(data.values()))
+            if revoked_at >= deadline and len(data) <= self.max_size:
+                break
+            data.popitem(last=False)
+
+
+REVOCATION_INDEX = RevocationIndex(
+    CFG.auth.refresh_token_expire_days * 86400, CFG.auth.revocation_index_size
+)
 
 
 async def create(
@@ -24,12 +96,11 @@ async def create(
     """
     refresh_token = RefreshToken(jti=jti, user_id=user_id, expires_at=expires_at)
     db_session.add(refresh_token)
-    await db_session.commit()
-    await db_session.refresh(refresh_token)
+    await db.commit(db_session)
     return refresh_token
 
 
-async def revoke(db_session: AsyncSession, jti: str, user_id: int) -> None:
+async def revoke(db_session: AsyncSession, jti: str, user_id: int) -> bool:
     """撤销指定的刷新令牌（软删除）
 
     将令牌的 yn 字段设置为 0，表示已撤销
@@ -38,6 +109,9 @@ async def revoke(db_session: AsyncSession, jti: str, user_id: int) -> None:
         db_session: 数据库会话
         jti: JWT 唯一标识符
         user_id: 关联的用户 ID（用于验证令牌归属）
+
+    Returns:
+        令牌此前有效且本次撤销成功返回 True，令牌不存在或已被撤销返回 False
     """
     stmt = (
         update(RefreshToken)
@@ -48,14 +122,16 @@ async def revoke(db_session: AsyncSession, jti: str, user_id: int) -> None:
         )
         .values(yn=0)
     )
-    await db_session.execute(stmt)
-    await db_session.commit()
+    result = await db_session.execute(stmt)
+    await db.commit(db_session)
+    db.after_commit(db_session, lambda: REVOCATION_INDEX.revoke(jti))
+    return result.rowcount > 0
 
 
 async def revoke_all(db_session: AsyncSession, user_id: int) -> None:
     """撤销用户的所有有效刷新令牌（软删除）
 
-    通常用于用户修改密码、登出所有设备等场景
+    通常用于用户修改密码、登出所有设备等场景，同时递增用户令牌代数使已签发的访问令牌失效
 
     Args:
         db_session: 数据库会话
@@ -70,7 +146,9 @@ async def revoke_all(db_session: AsyncSession, user_id: int) -> None:
         .values(yn=0)
     )
     await db_session.execute(stmt)
-    await db_session.commit()
+    await db.commit(db_session)
+    db.after_commit(db_session, lambda: REVOCATION_INDEX.revoke_user(user_id))
+    await token_epoch_repo.bump(db_session, user_id)
 
 
 async def get_by_jti(
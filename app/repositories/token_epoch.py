@@ -0,0 +1,89 @@
+"""用户令牌代数数据访问
+
+撤销用户所有令牌时递增代数，访问令牌携带签发时的代数，代数落后的令牌视为已撤销。
+各进程在内存中维护用户 ID 到最新代数的映射，并按更新时间增量同步
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.entities.auth import TokenEpoch
+from app.utils import db
+
+EPOCHS: dict[int, int] = {}  # 用户 ID -> 最新令牌代数，未记录的用户为 0
+SYNC_OVERLAP = timedelta(seconds=5)  # 增量同步回看时间，避免遗漏提交较晚的更新
+_WATERMARK: datetime | None = None  # 已同步记录的最大更新时间
+
+
+def observe(user_id: int, epoch: int) -> None:
+    """记录用户令牌代数（只增不减）"""
+    if epoch > EPOCHS.get(user_id, 0):
+        EPOCHS[user_id] = epoch
+
+
+def is_current(user_id: int, epoch: int) -> bool:
+    """令牌代数是否不低于用户最新代数"""
+    return epoch >= EPOCHS.get(user_id, 0)
+
+
+async def get(db_session: AsyncSession, user_id: int) -> int:
+    """从数据库获取用户当前令牌代数
+
+    Args:
+        db_session: 数据库会话
+        user_id: 用户 ID
+
+    Returns:
+        令牌代数，用户没有记录时返回 0
+    """
+    stmt = select(TokenEpoch.epoch).where(TokenEpoch.user_id == user_id)
+    return (await db_session.execute(stmt)).scalar_one_or_none() or 0
+
+
+async def bump(db_session: AsyncSession, user_id: int) -> int:
+    """递增用户令牌代数，使此前签发的访问令牌全部失效
+
+    Args:
+        db_session: 数据库会话
+        user_id: 用户 ID
+
+    Returns:
+        递增后的令牌代数
+    """
+    stmt = db.insert(db_session, TokenEpoch).values(user_id=user_id, epoch=1)
+    values = {"epoch": TokenEpoch.epoch + 1, "update_at": func.now()}
+    if db_session.bind.dialect.name == "mysql":
+        stmt = stmt.on_duplicate_key_update(**values)
+    else:
+        stmt = stmt.on_conflict_do_update(index_elements=["user_id"], set_=values)
+    await db_session.execute(stmt)
+    await db.commit(db_session)
+    epoch = await get(db_session, user_id)
+    # 事务提交后本进程立即生效，其他进程通过增量同步生效
+    db.after_commit(db_session, lambda: observe(user_id, epoch))
+    return epoch
+
+
+async def sync(db_session: AsyncSession) -> int:
+    """从数据库增量同步令牌代数到内存
+
+    首次调用加载全部记录，之后只读取更新时间不早于上次水位（减去回看时间）的记录
+
+    Args:
+        db_session: 数据库会话
+
+    Returns:
+        本次读取的记录数
+    """
+    global _WATERMARK
+    stmt = select(TokenEpoch.user_id, TokenEpoch.epoch, TokenEpoch.update_at)
+    if _WATERMARK is not None:
+        stmt = stmt.where(TokenEpoch.update_at >= _WATERMARK - SYNC_OVERLAP)
+    rows = (await db_session.execute(stmt)).all()
+    for user_id, epoch, update_at in rows:
+        observe(user_id, epoch)
+        if _WATERMARK is None or update_at > _WATERMARK:
+            _WATERMARK = update_at
+    return len(rows)
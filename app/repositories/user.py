@@ -1,13 +1,22 @@
 """用户数据访问"""
 
-from pwdlib._hash import PasswordHash
-from sqlalchemy import delete, func, select
+from typing import NamedTuple
+
+from sqlalchemy import Row, delete, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.entities.auth import Group, User
+from app.entities.auth import User
+from app.repositories import columns, count, effective_scope, search, user_scope
+from app.utils import db, hasher
+
+
+class UserCredential(NamedTuple):
+    """校验密码所需的用户信息"""
 
-passwd_hash = PasswordHash.recommended()
+    id: int  # 用户 ID
+    yn: int  # 是否启用
+    password_hash: str  # 密码哈希
 
 
 async def _execute_with_group(db_session: AsyncSession, stmt) -> User | None:
@@ -17,11 +26,55 @@ async def _execute_with_group(db_session: AsyncSession, stmt) -> User | None:
     return result.scalar_one_or_none()
 
 
-async def _execute_with_group_scope(db_session: AsyncSession, stmt) -> User | None:
-    """预加载 group 和 scope 关联数据"""
-    stmt = stmt.options(selectinload(User.group).selectinload(Group.scope))
-    result = await db_session.execute(stmt)
-    return result.unique().scalar_one_or_none()
+async def _get_credential(db_session: AsyncSession, where) -> UserCredential | None:
+    """只查询凭据列获取用户凭据"""
+    stmt = select(User.id, User.yn, User.password_hash).where(where)
+    row = (await db_session.execute(stmt)).first()
+    return UserCredential(*row) if row else None
+
+
+async def get_credential_by_id(
+    db_session: AsyncSession, user_id: int
+) -> UserCredential | None:
+    """通过 ID 获取用户凭据
+
+    Args:
+        db_session: 数据库会话
+        user_id: 用户 ID
+
+    Returns:
+        用户凭据，不存在则返回 None
+    """
+    return await _get_credential(db_session, User.id == user_id)
+
+
+async def get_credential_by_email(
+    db_session: AsyncSession, email: str
+) -> UserCredential | None:
+    """通过邮箱获取用户凭据
+
+    Args:
+        db_session: 数据库会话
+        email: 用户邮箱地址
+
+    Returns:
+        用户凭据，不存在则返回 None
+    """
+    return await _get_credential(db_session, User.email == email)
+
+
+async def get_yn(db_session: AsyncSession, user_id: int) -> int | None:
+    """通过 ID 获取用户启用状态（只查询状态列）
+
+    Args:
+        db_session: 数据库会话
+        user_id: 用户 ID
+
+    Returns:
+        启用状态（1-启用，0-禁用），用户不存在则返回 None
+    """
+    stmt = select(User.yn).where(User.id == user_id)
+    return (await db_session.execute(stmt)).scalar_one_or_none()
 
 
 async def get_by_id(db_session: AsyncSession, user_id: int) -> User | None:
@@ -39,24 +92,22 @@ async def get_by_id(db_session: AsyncSession, user_id: int) -> User | None:
     return result.scalar_one_or_none()
 
 
-async def get_by_id_with_group(db_session: AsyncSession, user_id: int) -> User | None:
-    """通过 ID 获取用户（预加载组）
+async def get_info(db_session: AsyncSession, user_id: int) -> Row | None:
+    """通过 ID 获取用户展示信息
 
     Args:
         db_session: 数据库会话
         user_id: 用户 ID
 
     Returns:
-        用户对象，不存在则返回 None
+        用户信息行（列见 columns.USER_INFO），不存在则返回 None
     """
-    stmt = select(User).where(User.id == user_id)
-    return await _execute_with_group(db_session, stmt)
+    stmt = select(*columns.USER_INFO).where(User.id == user_id)
+    return (await db_session.execute(stmt)).first()
 
 
-async def get_by_id_with_group_scope(
-    db_session: AsyncSession, user_id: int
-) -> User | None:
-    """通过 ID 获取用户（预加载组和权限）
+async def get_by_id_with_group(db_session: AsyncSession, user_id: int) -> User | None:
+    """通过 ID 获取用户（预加载组）
 
     Args:
         db_session: 数据库会话
@@ -66,7 +117,7 @@ async def get_by_id_with_group_scope(
         用户对象，不存在则返回 None
     """
     stmt = select(User).where(User.id == user_id)
-    return await _execute_with_group_scope(db_session, stmt)
+    return await _execute_with_group(db_session, stmt)
 
 
 async def get_by_email(db_session: AsyncSession, email: str) -> User | None:
@@ -98,22 +149,6 @@ async def get_by_email_with_group(db_session: AsyncSession, email: str) -> User
     return await _execute_with_group(db_session, stmt)
 
 
-async def get_by_email_with_group_scope(
-    db_session: AsyncSession, email: str
-) -> User | None:
-    """通过邮箱获取用户（预加载组和权限）
-
-    Args:
-        db_session: 数据库会话
-        email: 用户邮箱地址
-
-    Returns:
-        用户对象，不存在则返回 None
-    """
-    stmt = select(User).where(User.email == email)
-    return await _execute_with_group_scope(db_session, stmt)
-
-
 async def get_by_ids(
     db_session: AsyncSession,
     user_ids: list[int],
@@ -155,14 +190,57 @@ async def create(
     user = User(
         email=email,
         name=username,
-        password_hash=passwd_hash.hash(password),
+        password_hash=await hasher.hash_password(password),
     )
     db_session.add(user)
-    await db_session.commit()
-    await db_session.refresh(user)
+    await db.commit(db_session)
     return user
 
 
+async def get_existing_emails(db_session: AsyncSession, emails: list[str]) -> set[str]:
+    """查询已注册的邮箱
+
+    Args:
+        db_session: 数据库会话
+        emails: 邮箱地址列表
+
+    Returns:
+        其中已注册的邮箱集合
+    """
+    if not emails:
+        return set()
+    stmt = select(User.email).where(User.email.in_(emails))
+    result = await db_session.execute(stmt)
+    return set(result.scalars().all())
+
+
+async def bulk_create(
+    db_session: AsyncSession, users: list[tuple[str, str, str]]
+) -> list[int]:
+    """批量创建用户（executemany 插入，不提交事务）
+
+    Args:
+        db_session: 数据库会话
+        users: (email, username, password_hash) 元组列表，密码已 hash
+
+    Returns:
+        与输入顺序一致的用户 ID 列表
+    """
+    if not users:
+        return []
+    await db_session.execute(
+        insert(User),
+        [
+            {"email": email, "name": username, "password_hash": password_hash}
+            for email, username, password_hash in users
+        ],
+    )
+    emails = [email for email, _, _ in users]
+    stmt = select(User.email, User.id).where(User.email.in_(emails))
+    ids = dict((await db_session.execute(stmt)).all())
+    return [ids[email] for email in emails]
+
+
 async def update(
     db_session: AsyncSession,
     user: User,
@@ -188,10 +266,10 @@ async def update(
     if username is not None:
         user.name = username
     if password is not None:
-        user.password_hash = passwd_hash.hash(password)
+        user.password_hash = await hasher.hash_password(password)
     if yn is not None:
         user.yn = yn
-    await db_session.commit()
+    await db.commit(db_session)
 
 
 async def remove(db_session: AsyncSession, user_id: int) -> None:
@@ -203,12 +281,18 @@ async def remove(db_session: AsyncSession, user_id: int) -> None:
     """
     stmt = delete(User).where(User.id == user_id)
     await db_session.execute(stmt)
-    await db_session.commit()
+    await user_scope.remove_by_user(db_session, user_id)
+    await db.commit(db_session)
+    db.after_commit(db_session, lambda: effective_scope.invalidate([user_id]))
 
 
 async def ls(
-    db_session: AsyncSession, offset: int, limit: int, keyword: str | None = None
-) -> tuple[list[User], int]:
+    db_session: AsyncSession,
+    offset: int,
+    limit: int,
+    keyword: str | None = None,
+    before_id: int | None = None,
+) -> tuple[list[Row], count.Total]:
     """获取用户列表（支持分页和搜索）
 
     Args:
@@ -216,27 +300,31 @@ async def ls(
         offset: 分页偏移量，从 0 开始
         limit: 每页返回数量
         keyword: 搜索关键字，会匹配用户名和邮箱，为 None 则不搜索
+        before_id: 游标分页，只返回 ID 小于该值的记录，传入时忽略 offset
 
     Returns:
-        元组 (用户列表, 总数)
+        元组 (用户信息行列表（列见 columns.USER_INFO）, 总数及是否精确)
     """
     # 构建基础查询
-    base_stmt = select(User)
-    count_stmt = select(func.count()).select_from(User)
+    base_stmt = select(*columns.USER_INFO)
+    filter_cond = None
 
     # 添加搜索条件
     if keyword:
-        filter_cond = (User.name.contains(keyword)) | (User.email.contains(keyword))
+        filter_cond = search.match(db_session, User, [User.name, User.email], keyword)
         base_stmt = base_stmt.where(filter_cond)
-        count_stmt = count_stmt.where(filter_cond)
 
     # 执行查询
-    stmt = base_stmt.offset(offset).limit(limit).order_by(User.id.desc())
+    if before_id is not None:
+        # 游标分页：从上一页最后一条记录之后开始，不再跳过 offset 行
+        stmt = base_stmt.where(User.id < before_id)
+    else:
+        stmt = base_stmt.offset(offset)
+    stmt = stmt.limit(limit).order_by(User.id.desc())
     result = await db_session.execute(stmt)
-    users = result.scalars().all()
+    users = result.all()
 
     # 获取总数
-    total_result = await db_session.execute(count_stmt)
-    total = total_result.scalar() or 0
+    total = await count.count(db_session, User, keyword, filter_cond)
 
     return list(users), total
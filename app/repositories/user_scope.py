@@ -0,0 +1,183 @@
+"""用户有效权限物化表数据访问
+
+user_scope 表保存每个用户经由已启用组获得的已启用权限。关联关系、组和权限的
+启用状态变更时，按受影响的用户分批重新计算（先删除再 INSERT ... SELECT），
+调用方负责提交事务，以便与引起变更的写操作在同一事务内生效
+"""
+
+from collections.abc import Iterable
+
+from sqlalchemy import Row, delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.entities.auth import (
+    Group,
+    Scope,
+    User,
+    UserScope,
+    t_group_scope_rel,
+    t_group_user_rel,
+)
+from app.repositories import columns
+
+CHUNK_SIZE = 500  # 每批重新计算的用户数
+
+
+def _chunks(ids: Iterable[int], size: int = CHUNK_SIZE):
+    """将 ID 去重排序后分批"""
+    ids = sorted(set(ids))
+    for i in range(0, len(ids), size):
+        yield ids[i : i + size]
+
+
+def _effective_stmt(user_ids: list[int]):
+    """查询用户经由已启用组获得的已启用权限 (user_id, scope_id)"""
+    return (
+        select(t_group_user_rel.c.user_id, t_group_scope_rel.c.scope_id)
+        .join(Group, Group.id == t_group_user_rel.c.group_id)
+        .join(t_group_scope_rel, t_group_scope_rel.c.group_id == Group.id)
+        .join(Scope, Scope.id == t_group_scope_rel.c.scope_id)
+        .where(t_group_user_rel.c.user_id.in_(user_ids), Group.yn == 1, Scope.yn == 1)
+        .distinct()
+    )
+
+
+async def refresh_users(db_session: AsyncSession, user_ids: Iterable[int]) -> None:
+    """重新计算指定用户的有效权限（不提交事务）
+
+    Args:
+        db_session: 数据库会话
+        user_ids: 受影响的用户 ID
+    """
+    for chunk in _chunks(user_ids):
+        await db_session.execute(delete(UserScope).where(UserScope.user_id.in_(chunk)))
+        stmt = insert(UserScope).from_select(
+            ["user_id", "scope_id"], _effective_stmt(chunk)
+        )
+        await db_session.execute(stmt)
+
+
+async def get_user_ids_by_groups(
+    db_session: AsyncSession, group_ids: Iterable[int]
+) -> list[int]:
+    """获取组内的用户 ID
+
+    Args:
+        db_session: 数据库会话
+        group_ids: 组 ID
+
+    Returns:
+        去重后的用户 ID 列表
+    """
+    group_ids = list(set(group_ids))
+    if not group_ids:
+        return []
+    stmt = (
+        select(t_group_user_rel.c.user_id)
+        .where(t_group_user_rel.c.group_id.in_(group_ids))
+        .distinct()
+    )
+    result = await db_session.execute(stmt)
+    return list(result.scalars().all())
+
+
+async def get_user_ids_by_scope(db_session: AsyncSession, scope_id: int) -> list[int]:
+    """获取经由任意组（不论是否启用）关联到权限的用户 ID
+
+    Args:
+        db_session: 数据库会话
+        scope_id: 权限 ID
+
+    Returns:
+        去重后的用户 ID 列表
+    """
+    stmt = (
+        select(t_group_user_rel.c.user_id)
+        .join(
+            t_group_scope_rel,
+            t_group_scope_rel.c.group_id == t_group_user_rel.c.group_id,
+        )
+        .where(t_group_scope_rel.c.scope_id == scope_id)
+        .distinct()
+    )
+    result = await db_session.execute(stmt)
+    return list(result.scalars().all())
+
+
+async def remove_by_user(db_session: AsyncSession, user_id: int) -> None:
+    """删除用户的有效权限（不提交事务）
+
+    Args:
+        db_session: 数据库会话
+        user_id: 用户 ID
+    """
+    await db_session.execute(delete(UserScope).where(UserScope.user_id == user_id))
+
+
+async def get_scopes(db_session: AsyncSession, user_id: int) -> list[Row]:
+    """获取用户的有效权限
+
+    Args:
+        db_session: 数据库会话
+        user_id: 用户 ID
+
+    Returns:
+        权限信息行列表（列见 columns.SCOPE_INFO），按权限 ID 排序
+    """
+    stmt = (
+        select(*columns.SCOPE_INFO)
+        .join(UserScope, UserScope.scope_id == Scope.id)
+        .where(UserScope.user_id == user_id)
+        .order_by(Scope.id)
+    )
+    result = await db_session.execute(stmt)
+    return list(result.all())
+
+
+async def get_scope_names(db_session: AsyncSession, user_id: int) -> list[str]:
+    """获取用户的有效权限名称
+
+    Args:
+        db_session: 数据库会话
+        user_id: 用户 ID
+
+    Returns:
+        权限名称列表
+    """
+    stmt = (
+        select(Scope.name)
+        .join(UserScope, UserScope.scope_id == Scope.id)
+        .where(UserScope.user_id == user_id)
+    )
+    result = await db_session.execute(stmt)
+    return list(result.scalars().all())
+
+
+async def rebuild(db_session: AsyncSession) -> int:
+    """按用户 ID 分批重建全部用户的有效权限，每批提交一次，用于修复数据漂移
+
+    Args:
+        db_session: 数据库会话
+
+    Returns:
+        处理的用户数
+    """
+    total = 0
+    last_id = 0
+    while True:
+        stmt = (
+            select(User.id).where(User.id > last_id).order_by(User.id).limit(CHUNK_SIZE)
+        )
+        user_ids = list((await db_session.execute(stmt)).scalars().all())
+        if not user_ids:
+            break
+        await refresh_users(db_session, user_ids)
+        # 直接提交而非 db.commit，避免全量重建占用一个长事务
+        await db_session.commit()
+        total += len(user_ids)
+        last_id = user_ids[-1]
+    # 清理已删除用户残留的记录
+    stmt = delete(UserScope).where(UserScope.user_id.not_in(select(User.id)))
+    await db_session.execute(stmt)
+    await db_session.commit()
+    return total
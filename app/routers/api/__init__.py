@@ -1,7 +1,8 @@
 from fastapi import APIRouter
 
-from . import admin, user
+from . import admin, gateway, user
 
 router = APIRouter(prefix="/api")
 router.include_router(user.router, tags=["user"])
+router.include_router(gateway.router, tags=["gateway"])
 router.include_router(admin.router, tags=["admin"])
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends
 
 from app.services import scope as scope_service
 
-from . import group, relation, scope, user
+from . import export, group, metrics, relation, scope, user
 
 router = APIRouter(
     prefix="/admin",
@@ -13,3 +13,5 @@ router.include_router(user.router)
 router.include_router(group.router)
 router.include_router(scope.router)
 router.include_router(relation.router)
+router.include_router(export.router)
+router.include_router(metrics.router)
@@ -0,0 +1,39 @@
+"""数据导出接口"""
+
+import json
+from collections.abc import AsyncIterator
+from typing import Annotated
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.repositories import export as export_repo
+from app.schemas.admin import _format_datetime
+from app.utils import db
+from app.utils.log import logger
+
+router = APIRouter()
+
+
+async def _ndjson(batches: AsyncIterator[list[dict]]) -> AsyncIterator[str]:
+    """逐批编码为 NDJSON"""
+    async for batch in batches:
+        yield "".join(
+            json.dumps(row, ensure_ascii=False, default=_format_datetime) + "\n"
+            for row in batch
+        )
+
+
+@router.get("/export/{resource}")
+async def api_export(
+    resource: export_repo.Resource,
+    # 会话需要在响应体发送完毕后才关闭，因此不使用 scope="function"
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+) -> StreamingResponse:
+    """流式导出用户、组、权限或关联关系（NDJSON，每行一条记录）"""
+    logger.info(f"Admin exporting {resource}")
+    return StreamingResponse(
+        _ndjson(export_repo.stream(db_session, resource)),
+        media_type="application/x-ndjson",
+    )
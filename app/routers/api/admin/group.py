@@ -2,13 +2,15 @@
 
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.exceptions import group as group_error
 from app.repositories import group as group_repo
+from app.repositories import scope as scope_repo
+from app.repositories import table_version as table_version_repo
 from app.schemas import admin as admin_schema
-from app.utils import db
+from app.utils import db, etag, pagination
 from app.utils.log import logger
 
 router = APIRouter()
@@ -17,7 +19,7 @@ router = APIRouter()
 @router.post("/create_group", status_code=status.HTTP_201_CREATED)
 async def api_create_group(
     body: admin_schema.CreateGroupRequest,
-    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
 ) -> admin_schema.GroupInfo:
     """创建组"""
     # 检查组名是否已存在
@@ -32,7 +34,7 @@ async def api_create_group(
 @router.post("/update_group")
 async def api_update_group(
     body: admin_schema.UpdateGroupRequest,
-    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
 ) -> admin_schema.GroupInfo:
     """更新组信息"""
     # 获取组
@@ -56,7 +58,7 @@ async def api_update_group(
 @router.post("/remove_group")
 async def api_remove_group(
     body: admin_schema.RemoveGroupRequest,
-    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
 ) -> None:
     """删除组"""
     await group_repo.remove(db_session, body.group_id)
@@ -64,37 +66,90 @@ async def api_remove_group(
 
 @router.get("/list_groups")
 async def api_list_groups(
-    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+    request: Request,
+    response: Response,
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
     offset: int = Query(default=0, ge=0, description="偏移量"),
     limit: int = Query(default=20, ge=1, le=100, description="每页数量"),
     keyword: str | None = Query(default=None, description="搜索关键字"),
+    cursor: str | None = Query(
+        default=None, description="分页游标（上一页的 next_cursor），传入时忽略 offset"
+    ),
 ) -> admin_schema.GroupListResponse:
     """查询所有组（支持分页和搜索）"""
-    groups, total = await group_repo.ls(db_session, offset, limit, keyword)
+    # 相关表未变更时直接返回 304
+    versions = await table_version_repo.get(db_session, ["group"])
+    if not_modified := etag.check(request, response, versions):
+        return not_modified
+    groups, total = await group_repo.ls(
+        db_session, offset, limit, keyword, pagination.decode_cursor(cursor)
+    )
     return admin_schema.GroupListResponse(
-        total=total,
+        total=total.value,
+        total_exact=total.exact,
         items=[admin_schema.GroupInfo.from_group(group) for group in groups],
+        next_cursor=pagination.next_cursor([group.id for group in groups], limit),
     )
 
 
 @router.get("/group/{group_id}")
 async def api_get_group(
     group_id: int,
-    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+    request: Request,
+    response: Response,
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
 ) -> admin_schema.GroupDetailResponse:
-    """查询组详情（包括用户和权限）"""
-    # 获取组、用户、权限信息
-    group = await group_repo.get_by_id_with_user_scope(db_session, group_id)
+    """查询组详情（包括权限和用户数）"""
+    # 相关表未变更时直接返回 304
+    versions = await table_version_repo.get(
+        db_session, ["group", "scope", "group_user_rel", "group_scope_rel"]
+    )
+    if not_modified := etag.check(request, response, versions):
+        return not_modified
+    # 获取组、权限信息
+    group = await group_repo.get_info(db_session, group_id)
     # 检查组是否存在
     if not group:
         raise group_error.GroupNotFoundError  # 组不存在
-    users = [admin_schema.UserInfo.from_user(u) for u in group.user]
-    scopes = [admin_schema.ScopeInfo.from_scope(s) for s in group.scope]
+    scopes = [
+        admin_schema.ScopeInfo.from_scope(s)
+        for s in await scope_repo.get_infos_by_group(db_session, group_id)
+    ]
     return admin_schema.GroupDetailResponse(
         id=group.id,
         name=group.name,
         yn=group.yn,
         create_at=admin_schema._format_datetime(group.create_at),
-        users=users,
+        user_count=await group_repo.count_users(db_session, group_id),
         scopes=scopes,
     )
+
+
+@router.get("/group/{group_id}/users")
+async def api_list_group_users(
+    group_id: int,
+    request: Request,
+    response: Response,
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
+    limit: int = Query(default=100, ge=1, le=1000, description="每页数量"),
+    cursor: str | None = Query(
+        default=None, description="分页游标（上一页的 next_cursor）"
+    ),
+) -> admin_schema.UserListResponse:
+    """分页查询组内用户"""
+    # 相关表未变更时直接返回 304
+    versions = await table_version_repo.get(
+        db_session, ["user", "group", "group_user_rel"]
+    )
+    if not_modified := etag.check(request, response, versions):
+        return not_modified
+    if not await group_repo.get_by_id(db_session, group_id):
+        raise group_error.GroupNotFoundError  # 组不存在
+    users = await group_repo.ls_users(
+        db_session, group_id, limit, pagination.decode_cursor(cursor)
+    )
+    return admin_schema.UserListResponse(
+        total=await group_repo.count_users(db_session, group_id),
+        items=[admin_schema.UserInfo.from_user(user) for user in users],
+        next_cursor=pagination.next_cursor([user.id for user in users], limit),
+    )
@@ -0,0 +1,13 @@
+"""运行指标接口"""
+
+from fastapi import APIRouter
+
+from app.utils import metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics")
+async def api_get_metrics() -> dict:
+    """查询进程内运行指标（哈希进程池、缓存命中、分阶段耗时等）"""
+    return metrics.snapshot()
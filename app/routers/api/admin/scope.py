@@ -2,13 +2,15 @@
 
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.exceptions import scope as scope_error
+from app.repositories import group as group_repo
 from app.repositories import scope as scope_repo
+from app.repositories import table_version as table_version_repo
 from app.schemas import admin as admin_schema
-from app.utils import db
+from app.utils import db, etag, pagination
 from app.utils.log import logger
 
 router = APIRouter()
@@ -17,7 +19,7 @@ router = APIRouter()
 @router.post("/create_scope", status_code=status.HTTP_201_CREATED)
 async def api_create_scope(
     body: admin_schema.CreateScopeRequest,
-    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
 ) -> admin_schema.ScopeInfo:
     """创建权限"""
     # 检查权限名是否已存在
@@ -32,7 +34,7 @@ async def api_create_scope(
 @router.post("/update_scope")
 async def api_update_scope(
     body: admin_schema.UpdateScopeRequest,
-    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
 ) -> admin_schema.ScopeInfo:
     """更新权限信息"""
     # 获取权限
@@ -58,7 +60,7 @@ async def api_update_scope(
 @router.post("/remove_scope")
 async def api_remove_scope(
     body: admin_schema.RemoveScopeRequest,
-    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
 ) -> None:
     """删除权限"""
     await scope_repo.remove(db_session, body.scope_id)
@@ -66,40 +68,56 @@ async def api_remove_scope(
 
 @router.get("/list_scopes")
 async def api_list_scopes(
-    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+    request: Request,
+    response: Response,
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
     offset: int = Query(default=0, ge=0, description="偏移量"),
     limit: int = Query(default=20, ge=1, le=100, description="每页数量"),
     keyword: str | None = Query(default=None, description="搜索关键字"),
+    cursor: str | None = Query(
+        default=None, description="分页游标（上一页的 next_cursor），传入时忽略 offset"
+    ),
 ) -> admin_schema.ScopeListResponse:
     """查询所有权限（支持分页和搜索）"""
-    scopes, total = await scope_repo.ls(db_session, offset, limit, keyword)
+    # 相关表未变更时直接返回 304
+    versions = await table_version_repo.get(db_session, ["scope"])
+    if not_modified := etag.check(request, response, versions):
+        return not_modified
+    scopes, total = await scope_repo.ls(
+        db_session, offset, limit, keyword, pagination.decode_cursor(cursor)
+    )
     return admin_schema.ScopeListResponse(
-        total=total,
+        total=total.value,
+        total_exact=total.exact,
         items=[admin_schema.ScopeInfo.from_scope(scope) for scope in scopes],
+        next_cursor=pagination.next_cursor([scope.id for scope in scopes], limit),
     )
 
 
 @router.get("/scope/{scope_id}")
 async def api_get_scope(
     scope_id: int,
-    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+    request: Request,
+    response: Response,
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
 ) -> admin_schema.ScopeDetailResponse:
-    """查询权限详情（包括拥有此权限的组和用户）"""
-    # 获取权限、组及组内用户信息
-    scope = await scope_repo.get_by_id_with_group_user(db_session, scope_id)
+    """查询权限详情（包括拥有此权限的组和用户数）"""
+    # 相关表未变更时直接返回 304
+    versions = await table_version_repo.get(
+        db_session, ["scope", "group", "group_user_rel", "group_scope_rel"]
+    )
+    if not_modified := etag.check(request, response, versions):
+        return not_modified
+    # 获取权限、组信息
+    scope = await scope_repo.get_info(db_session, scope_id)
     # 检查权限是否存在
     if not scope:
         raise scope_error.ScopeNotFoundError  # 权限不存在
     # 获取权限的组
-    groups = [admin_schema.GroupInfo.from_group(g) for g in scope.group]
-    # 获取权限的用户
-    seen_user_ids = set()
-    users = []
-    for g in scope.group:
-        for u in g.user:
-            if u.id not in seen_user_ids:
-                seen_user_ids.add(u.id)
-                users.append(admin_schema.UserInfo.from_user(u))
+    groups = [
+        admin_schema.GroupInfo.from_group(g)
+        for g in await group_repo.get_infos_by_scope(db_session, scope_id)
+    ]
     return admin_schema.ScopeDetailResponse(
         id=scope.id,
         name=scope.name,
@@ -107,5 +125,37 @@ async def api_get_scope(
         yn=scope.yn,
         create_at=admin_schema._format_datetime(scope.create_at),
         groups=groups,
-        users=users,
+        user_count=await scope_repo.count_users(db_session, scope_id),
+    )
+
+
+@router.get("/scope/{scope_id}/users")
+async def api_list_scope_users(
+    scope_id: int,
+    request: Request,
+    response: Response,
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
+    limit: int = Query(default=100, ge=1, le=1000, description="每页数量"),
+    cursor: str | None = Query(
+        default=None, description="分页游标（上一页的 next_cursor）"
+    ),
+) -> admin_schema.UserListResponse:
+    """分页查询经由任意组拥有此权限的用户（总数需要全量去重统计，只在第一页返回）"""
+    # 相关表未变更时直接返回 304
+    versions = await table_version_repo.get(
+        db_session, ["user", "scope", "group_user_rel", "group_scope_rel"]
+    )
+    if not_modified := etag.check(request, response, versions):
+        return not_modified
+    if not await scope_repo.get_by_id(db_session, scope_id):
+        raise scope_error.ScopeNotFoundError  # 权限不存在
+    before_id = pagination.decode_cursor(cursor)
+    users = await scope_repo.ls_users(db_session, scope_id, limit, before_id)
+    total = None
+    if before_id is None:
+        total = await scope_repo.count_users(db_session, scope_id)
+    return admin_schema.UserListResponse(
+        total=total,
+        items=[admin_schema.UserInfo.from_user(user) for user in users],
+        next_cursor=pagination.next_cursor([user.id for user in users], limit),
     )
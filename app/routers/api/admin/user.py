@@ -1,15 +1,20 @@
 """用户管理接口"""
 
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.exceptions import group as group_error
 from app.exceptions import user as user_error
+from app.repositories import group as group_repo
+from app.repositories import table_version as table_version_repo
 from app.repositories import user as user_repo
+from app.repositories import user_scope as user_scope_repo
 from app.schemas import admin as admin_schema
 from app.schemas.admin import _format_datetime
-from app.utils import db
+from app.services import user as user_service
+from app.utils import db, etag, pagination
 from app.utils.log import logger
 
 router = APIRouter()
@@ -18,7 +23,7 @@ router = APIRouter()
 @router.post("/create_user", status_code=status.HTTP_201_CREATED)
 async def api_create_user(
     body: admin_schema.CreateUserRequest,
-    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
 ) -> admin_schema.UserInfo:
     """创建用户"""
     # 检查邮箱是否已经注册
@@ -30,10 +35,34 @@ async def api_create_user(
     return admin_schema.UserInfo.from_user(user)
 
 
+@router.post("/import_users")
+async def api_import_users(
+    request: Request,
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
+    file_format: Literal["csv", "ndjson"] = Query(
+        default="ndjson", alias="format", description="请求体格式"
+    ),
+    group_ids: list[int] = Query(default=[], description="新用户加入的组ID"),
+) -> admin_schema.ImportUsersResponse:
+    """批量导入用户（流式读取 CSV 或 NDJSON 请求体，逐行返回失败原因）"""
+    if len(await group_repo.get_by_ids(db_session, group_ids)) != len(set(group_ids)):
+        raise group_error.GroupNotFoundError  # 组不存在
+    result = await user_service.import_users(
+        db_session,
+        user_service.iter_lines(request.stream()),
+        file_format,
+        group_ids,
+    )
+    logger.info(
+        f"Admin imported users: created={result.created}, failed={result.failed}"
+    )
+    return result
+
+
 @router.post("/update_user")
 async def api_update_user(
     body: admin_schema.UpdateUserRequest,
-    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
 ) -> None:
     """更新用户信息"""
     # 获取用户信息
@@ -63,7 +92,7 @@ async def api_update_user(
 @router.post("/remove_user")
 async def api_remove_user(
     body: admin_schema.RemoveUserRequest,
-    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
 ) -> None:
     """删除用户"""
     await user_repo.remove(db_session, body.user_id)
@@ -71,39 +100,61 @@ async def api_remove_user(
 
 @router.get("/list_users")
 async def api_list_users(
-    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+    request: Request,
+    response: Response,
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
     offset: int = Query(default=0, ge=0, description="偏移量"),
     limit: int = Query(default=100, ge=10, le=1000, description="每页数量"),
     keyword: str | None = Query(default=None, description="搜索关键字"),
+    cursor: str | None = Query(
+        default=None, description="分页游标（上一页的 next_cursor），传入时忽略 offset"
+    ),
 ) -> admin_schema.UserListResponse:
     """查询所有用户（支持分页和搜索）"""
-    users, total = await user_repo.ls(db_session, offset, limit, keyword)
+    # 相关表未变更时直接返回 304
+    versions = await table_version_repo.get(db_session, ["user"])
+    if not_modified := etag.check(request, response, versions):
+        return not_modified
+    users, total = await user_repo.ls(
+        db_session, offset, limit, keyword, pagination.decode_cursor(cursor)
+    )
     return admin_schema.UserListResponse(
-        total=total, items=[admin_schema.UserInfo.from_user(user) for user in users]
+        total=total.value,
+        total_exact=total.exact,
+        items=[admin_schema.UserInfo.from_user(user) for user in users],
+        next_cursor=pagination.next_cursor([user.id for user in users], limit),
     )
 
 
 @router.get("/user/{user_id}")
 async def api_get_user(
     user_id: int,
-    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+    request: Request,
+    response: Response,
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
 ) -> admin_schema.UserDetailResponse:
     """查询用户详情（包括组和权限）"""
-    # 获取用户信息（预加载组和权限）
-    user = await user_repo.get_by_id_with_group_scope(db_session, user_id)
+    # 相关表未变更时直接返回 304
+    versions = await table_version_repo.get(
+        db_session, ["user", "group", "scope", "group_user_rel", "group_scope_rel"]
+    )
+    if not_modified := etag.check(request, response, versions):
+        return not_modified
+    # 获取用户信息
+    user = await user_repo.get_info(db_session, user_id)
     # 检查用户是否存在
     if not user:
         raise user_error.UserNotFoundError  # 用户不存在
     # 获取用户的组
-    groups = [admin_schema.GroupInfo.from_group(g) for g in user.group]
-    # 获取用户的权限
-    seen_scope_ids = set()
-    scopes = []
-    for g in user.group:
-        for s in g.scope:
-            if s.id not in seen_scope_ids:
-                seen_scope_ids.add(s.id)
-                scopes.append(admin_schema.ScopeInfo.from_scope(s))
+    groups = [
+        admin_schema.GroupInfo.from_group(g)
+        for g in await group_repo.get_infos_by_user(db_session, user_id)
+    ]
+    # 获取用户的有效权限
+    scopes = [
+        admin_schema.ScopeInfo.from_scope(s)
+        for s in await user_scope_repo.get_scopes(db_session, user_id)
+    ]
     return admin_schema.UserDetailResponse(
         id=user.id,
         email=user.email,
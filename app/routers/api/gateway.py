@@ -0,0 +1,43 @@
+"""网关外部认证接口"""
+
+from typing import Annotated
+
+from fastapi import APIRouter, Header, Response, status
+
+from app.exceptions.base import AppError
+from app.services import token as token_service
+
+router = APIRouter()
+
+
+@router.api_route(
+    "/auth_request",
+    methods=["GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def api_auth_request(
+    authorization: Annotated[str | None, Header()] = None,
+) -> Response:
+    """网关子请求认证（nginx auth_request / envoy ext_authz）
+
+    只返回状态码和请求头，不返回响应体：
+    认证成功返回 204，并通过 X-User-Id、X-User-Scopes 传递用户信息；
+    认证失败返回 401，并通过 X-Auth-Error 传递错误类型
+    """
+    try:
+        payload = await token_service.authenticate_authorization(authorization)
+    except AppError as e:
+        return Response(
+            status_code=e.status_code,
+            headers={
+                "WWW-Authenticate": 'Bearer error="invalid_token"',
+                "X-Auth-Error": type(e).__name__,
+            },
+        )
+    return Response(
+        status_code=status.HTTP_204_NO_CONTENT,
+        headers={
+            "X-User-Id": str(payload.sub),
+            "X-User-Scopes": " ".join(payload.scope),
+        },
+    )
@@ -1,9 +1,14 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Response, status
+from fastapi import APIRouter, Depends, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import CFG
+from app.exceptions import auth as auth_error
 from app.exceptions import user as user_error
+from app.exceptions.base import AppError
+from app.repositories import effective_scope as effective_scope_repo
+from app.repositories import table_version as table_version_repo
 from app.repositories import token as token_repo
 from app.repositories import user as user_repo
 from app.schemas import token as token_schema
@@ -12,11 +17,13 @@ from app.services import email as email_service
 from app.services import email_code as email_code_service
 from app.services import token as token_service
 from app.services import user as user_service
-from app.utils import context, db
+from app.utils import context, db, etag, metrics
 from app.utils.log import logger
 
 router = APIRouter(tags=["user"])
 
+ME_TABLES = ["user", "group", "group_user_rel"]  # 决定 /me 响应内容的表
+
 
 async def _create_and_set_token(
     db_session: AsyncSession, user_id: int, scopes: list[str], response: Response
@@ -38,7 +45,7 @@ async def _create_and_set_token(
 @router.post("/send_email_code")
 async def api_send_email_code(
     body: user_schema.SendCodeRequest,
-    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
 ) -> None:
     """发送邮箱验证码"""
     user = await user_repo.get_by_email(db_session, body.email)
@@ -63,7 +70,7 @@ async def api_send_email_code(
 @router.post("/register")
 async def api_register(
     body: user_schema.RegisterRequest,
-    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
     response: Response,
 ) -> user_schema.LoginResponse:
     """注册新用户"""
@@ -76,18 +83,11 @@ async def api_register(
     )
     # 将用户加入数据库
     user = await user_repo.create(db_session, body.email, body.username, body.password)
-    # 获取用户信息
-    user = await user_repo.get_by_id_with_group_scope(db_session, user.id)
-    # 检查用户是否存在
-    if not user:
-        raise user_error.UserNotFoundError  # 用户不存在
     # 设置 user_id 到 ContextVar
     context.user_id_ctx.set(str(user.id))
     logger.info("User register")
     # 获取权限信息
-    scopes = list(
-        {s.name for g in user.group if g.yn == 1 for s in g.scope if s.yn == 1}
-    )
+    scopes = await effective_scope_repo.get(db_session, user.id)
     # 创建并设置令牌
     tokens = await _create_and_set_token(db_session, user.id, scopes, response)
     return user_schema.LoginResponse(**tokens)
@@ -96,43 +96,61 @@ async def api_register(
 @router.post("/login")
 async def api_login(
     body: user_schema.LoginRequest,
-    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
     response: Response,
 ) -> user_schema.LoginResponse:
-    """用户登录"""
-    # 通过邮箱获取用户信息
-    user = await user_repo.get_by_email_with_group_scope(db_session, body.email)
+    """用户登录
+
+    分两阶段：先只查询凭据列并校验密码，通过后才加载权限并签发令牌，
+    使失败的登录不必承担权限查询的开销。各阶段耗时记录到 login_*_ms 指标
+    """
+    timer = metrics.PhaseTimer("login")
+    # 阶段一：通过邮箱获取用户凭据
+    user = await user_repo.get_credential_by_email(db_session, body.email)
+    timer.lap("lookup")
     # 检查用户是否存在
     if not user:
         raise user_error.UserNotFoundError  # 用户不存在
     # 设置 user_id 到 ContextVar
     context.user_id_ctx.set(str(user.id))
     logger.info("User login")
-    # 获取权限信息
-    scopes = list(
-        {s.name for g in user.group if g.yn == 1 for s in g.scope if s.yn == 1}
-    )
     # 检查用户是否被禁用
     if not user.yn:
         raise user_error.UserDisabledError  # 用户被禁用
     # 验证密码
-    if not user_service.verify_password(user, body.password):
+    verified = await user_service.verify_password(user, body.password)
+    timer.lap("verify")
+    if not verified:
+        logger.info("User login failed", **timer.phases)
         raise user_error.InvalidCredentialsError  # 邮箱或密码错误
+    # 阶段二：获取权限信息
+    scopes = await effective_scope_repo.get(db_session, user.id)
+    timer.lap("scope")
     # 创建并设置令牌
     tokens = await _create_and_set_token(db_session, user.id, scopes, response)
+    timer.lap("token")
+    logger.info("User login succeeded", **timer.phases)
+    if CFG.log.server_timing:
+        response.headers["Server-Timing"] = timer.server_timing()
     return user_schema.LoginResponse(**tokens)
 
 
 @router.get("/me")
 async def api_me(
-    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+    request: Request,
+    response: Response,
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
     payload: Annotated[
         token_schema.AccessTokenPayload,
         Depends(token_service.authenticate_access_token),
     ],
 ) -> user_schema.UserResponse:
-    """获取当前用户信息"""
+    """获取当前用户信息（支持 If-None-Match 条件请求）"""
     logger.info("User get user info")
+    # 相关表未变更时直接返回 304
+    versions = await table_version_repo.get(db_session, ME_TABLES)
+    if not_modified := etag.check(request, response, versions, payload.sub):
+        return not_modified
     # 获取用户信息
     user = await user_repo.get_by_id_with_group(db_session, payload.sub)
     # 检查用户是否存在
@@ -149,7 +167,7 @@ async def api_me(
 @router.post("/me/username", status_code=status.HTTP_202_ACCEPTED)
 async def api_update_username(
     body: user_schema.UpdateUsernameRequest,
-    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
     payload: Annotated[
         token_schema.AccessTokenPayload,
         Depends(token_service.authenticate_access_token),
@@ -175,7 +193,7 @@ async def api_update_username(
 @router.post("/me/email", status_code=status.HTTP_202_ACCEPTED)
 async def api_update_email(
     body: user_schema.UpdateEmailRequest,
-    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
     payload: Annotated[
         token_schema.RefreshTokenPayload,
         Depends(token_service.authenticate_refresh_token),
@@ -185,7 +203,7 @@ async def api_update_email(
     """修改邮箱"""
     logger.info("User update email")
     # 获取用户信息
-    user = await user_repo.get_by_id_with_group_scope(db_session, payload.sub)
+    user = await user_repo.get_by_id(db_session, payload.sub)
     # 检查用户是否存在
     if not user:
         raise user_error.UserNotFoundError  # 用户不存在
@@ -198,15 +216,16 @@ async def api_update_email(
     # 检查邮箱是否已经注册
     if await user_repo.get_by_email(db_session, body.email):
         raise user_error.EmailAlreadyExistsError  # 邮箱已注册
+    # 撤销当前刷新令牌，令牌已被其他进程撤销时拒绝本次修改
+    if not await token_repo.revoke(db_session, payload.jti, payload.sub):
+        raise auth_error.InvalidRefreshTokenError  # 刷新令牌已撤销
     # 更新邮箱
     await user_repo.update(db_session, user, email=body.email)
     # 撤销用户所有刷新令牌
     await token_repo.revoke_all(db_session, payload.sub)
     logger.info("User email updated, all refresh tokens revoked")
     # 获取权限信息
-    scopes = list(
-        {s.name for g in user.group if g.yn == 1 for s in g.scope if s.yn == 1}
-    )
+    scopes = await effective_scope_repo.get(db_session, user.id)
     # 创建并设置令牌
     tokens = await _create_and_set_token(db_session, user.id, scopes, response)
     return user_schema.LoginResponse(**tokens)
@@ -215,7 +234,7 @@ async def api_update_email(
 @router.post("/me/password", status_code=status.HTTP_202_ACCEPTED)
 async def api_update_password(
     body: user_schema.UpdatePasswordRequest,
-    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
     payload: Annotated[
         token_schema.RefreshTokenPayload,
         Depends(token_service.authenticate_refresh_token),
@@ -225,7 +244,7 @@ async def api_update_password(
     """修改密码"""
     logger.info("User update password")
     # 获取用户信息
-    user = await user_repo.get_by_id_with_group_scope(db_session, payload.sub)
+    user = await user_repo.get_by_id(db_session, payload.sub)
     # 检查用户是否存在
     if not user:
         raise user_error.UserNotFoundError  # 用户不存在
@@ -233,17 +252,18 @@ async def api_update_password(
     if not user.yn:
         raise user_error.UserDisabledError  # 用户被禁用
     # 检查密码是否和原密码相同
-    if user_service.verify_password(user, body.password):
+    if await user_service.verify_password(user, body.password):
         raise user_error.UserPasswordSameError  # 密码与原密码相同
+    # 撤销当前刷新令牌，令牌已被其他进程撤销时拒绝本次修改
+    if not await token_repo.revoke(db_session, payload.jti, payload.sub):
+        raise auth_error.InvalidRefreshTokenError  # 刷新令牌已撤销
     # 更新密码
     await user_repo.update(db_session, user, password=body.password)
     # 撤销用户所有刷新令牌
     await token_repo.revoke_all(db_session, payload.sub)
     logger.info("User password updated, all refresh tokens revoked")
     # 获取权限信息
-    scopes = list(
-        {s.name for g in user.group if g.yn == 1 for s in g.scope if s.yn == 1}
-    )
+    scopes = await effective_scope_repo.get(db_session, user.id)
     # 创建并设置令牌
     tokens = await _create_and_set_token(db_session, user.id, scopes, response)
     return user_schema.LoginResponse(**tokens)
@@ -251,7 +271,7 @@ async def api_update_password(
 
 @router.post("/logout")
 async def api_logout(
-    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
     payload: Annotated[
         token_schema.RefreshTokenPayload,
         Depends(token_service.authenticate_refresh_token),
@@ -259,13 +279,14 @@ async def api_logout(
 ) -> None:
     """登出"""
     logger.info("Logout")
-    # 撤销旧的刷新令牌
-    await token_repo.revoke(db_session, payload.jti, payload.sub)
+    # 撤销旧的刷新令牌，令牌已被撤销时说明被重复使用
+    if not await token_repo.revoke(db_session, payload.jti, payload.sub):
+        raise auth_error.InvalidRefreshTokenError  # 刷新令牌已撤销
 
 
 @router.post("/refresh")
 async def api_refresh(
-    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
     payload: Annotated[
         token_schema.RefreshTokenPayload,
         Depends(token_service.authenticate_refresh_token),
@@ -274,22 +295,21 @@ async def api_refresh(
 ) -> user_schema.LoginResponse:
     """刷新访问令牌"""
     logger.info("Refresh access token")
-    # 撤销旧的刷新令牌
-    await token_repo.revoke(db_session, payload.jti, payload.sub)
-    # 获取用户信息
-    user = await user_repo.get_by_id_with_group_scope(db_session, payload.sub)
+    # 撤销旧的刷新令牌，令牌已被撤销时说明被重复使用
+    if not await token_repo.revoke(db_session, payload.jti, payload.sub):
+        raise auth_error.InvalidRefreshTokenError  # 刷新令牌已撤销
+    # 获取用户启用状态（只查询状态列）
+    yn = await user_repo.get_yn(db_session, payload.sub)
     # 检查用户是否存在
-    if not user:
+    if yn is None:
         raise user_error.UserNotFoundError  # 用户不存在
     # 检查用户是否被禁用
-    if not user.yn:
+    if not yn:
         raise user_error.UserDisabledError  # 用户被禁用
     # 获取权限信息
-    scopes = list(
-        {s.name for g in user.group if g.yn == 1 for s in g.scope if s.yn == 1}
-    )
+    scopes = await effective_scope_repo.get(db_session, payload.sub)
     # 创建并设置令牌
-    tokens = await _create_and_set_token(db_session, user.id, scopes, response)
+    tokens = await _create_and_set_token(db_session, payload.sub, scopes, response)
     return user_schema.LoginResponse(**tokens)
 
 
@@ -303,3 +323,23 @@ async def api_verify_access_token(
     """验证访问令牌"""
     logger.info("Verify access token")
     return payload
+
+
+@router.post("/verify_access_tokens")
+async def api_verify_access_tokens(
+    body: token_schema.VerifyAccessTokensRequest,
+) -> token_schema.VerifyAccessTokensResponse:
+    """批量验证访问令牌（供网关使用，逐个返回验证结果）"""
+    results = []
+    for access_token in body.tokens:
+        try:
+            payload = token_service.decode_access_token(access_token)
+            results.append(token_schema.VerifyAccessTokenResult(payload=payload))
+        except AppError as e:
+            results.append(
+                token_schema.VerifyAccessTokenResult(
+                    code=e.code, exc_type=type(e).__name__, message=e.message
+                )
+            )
+    logger.info(f"Verify {len(results)} access tokens")
+    return token_schema.VerifyAccessTokensResponse(results=results)
@@ -0,0 +1,15 @@
+"""公开元数据接口"""
+
+from fastapi import APIRouter, Response
+
+from app.config import CFG
+from app.services import token as token_service
+
+router = APIRouter(prefix="/.well-known", tags=["well-known"])
+
+
+@router.get("/jwks.json")
+async def api_jwks(response: Response) -> dict:
+    """获取令牌验签公钥（供下游服务离线验证访问令牌）"""
+    response.headers["Cache-Control"] = f"public, max-age={CFG.auth.jwks_max_age}"
+    return token_service.get_jwks()
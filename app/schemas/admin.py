@@ -6,13 +6,16 @@ from typing import TYPE_CHECKING
 from pydantic import BaseModel, EmailStr, Field, field_validator
 
 if TYPE_CHECKING:
+    from sqlalchemy import Row
+
     from app.entities.auth import Group, Scope, User
 
 
 def _format_datetime(dt: datetime | None) -> str | None:
     """格式化日期时间"""
     if dt:
-        return dt.strftime("%Y-%m-%d %H:%M:%S")
+        # 数据库返回不带时区的时间，结果同 strftime("%Y-%m-%d %H:%M:%S")，但快数倍
+        return dt.isoformat(" ", "seconds")
     return None
 
 
@@ -26,8 +29,8 @@ class UserInfo(BaseModel):
     create_at: str | None = Field(..., description="创建时间")
 
     @classmethod
-    def from_user(cls, user: "User") -> "UserInfo":
-        """从 User ORM 对象创建 UserInfo"""
+    def from_user(cls, user: "User | Row") -> "UserInfo":
+        """从 User ORM 对象或信息行创建 UserInfo"""
         return cls(
             id=user.id,
             email=user.email,
@@ -46,8 +49,8 @@ class GroupInfo(BaseModel):
     create_at: str | None = Field(default=None, description="创建时间")
 
     @classmethod
-    def from_group(cls, group: "Group") -> "GroupInfo":
-        """从 Group ORM 对象创建 GroupInfo"""
+    def from_group(cls, group: "Group | Row") -> "GroupInfo":
+        """从 Group ORM 对象或信息行创建 GroupInfo"""
         return cls(
             id=group.id,
             name=group.name,
@@ -66,8 +69,8 @@ class ScopeInfo(BaseModel):
     create_at: str | None = Field(default=None, description="创建时间")
 
     @classmethod
-    def from_scope(cls, scope: "Scope") -> "ScopeInfo":
-        """从 Scope ORM 对象创建 ScopeInfo"""
+    def from_scope(cls, scope: "Scope | Row") -> "ScopeInfo":
+        """从 Scope ORM 对象或信息行创建 ScopeInfo"""
         return cls(
             id=scope.id,
             name=scope.name,
@@ -158,8 +161,32 @@ class UserDetailResponse(UserInfo):
 class UserListResponse(BaseModel):
     """用户列表响应"""
 
-    total: int = Field(..., description="总数")
+    total: int | None = Field(
+        ..., description="总数（权限用户列表只在第一页统计，后续页为 None）"
+    )
+    total_exact: bool = Field(
+        default=True, description="总数是否精确（缓存或估算时为 false）"
+    )
     items: list[UserInfo] = Field(..., description="用户列表")
+    next_cursor: str | None = Field(
+        default=None, description="下一页游标，没有更多数据时为 None"
+    )
+
+
+class ImportUserError(BaseModel):
+    """导入失败的行"""
+
+    line: int = Field(..., description="行号（从1开始）")
+    email: str | None = Field(default=None, description="邮箱")
+    message: str = Field(..., description="失败原因")
+
+
+class ImportUsersResponse(BaseModel):
+    """批量导入用户响应"""
+
+    created: int = Field(default=0, description="创建的用户数")
+    failed: int = Field(default=0, description="失败的行数")
+    errors: list[ImportUserError] = Field(default=[], description="失败的行")
 
 
 # ========== 组相关 ==========
@@ -196,7 +223,9 @@ class RemoveGroupRequest(BaseModel):
 class GroupDetailResponse(GroupInfo):
     """组详情响应"""
 
-    users: list[UserInfo] = Field(default=[], description="组内用户列表")
+    user_count: int = Field(
+        default=0, description="组内用户数（列表见 /group/{id}/users）"
+    )
     scopes: list[ScopeInfo] = Field(default=[], description="组权限列表")
 
 
@@ -204,7 +233,13 @@ class GroupListResponse(BaseModel):
     """组列表响应"""
 
     total: int = Field(..., description="总数")
+    total_exact: bool = Field(
+        default=True, description="总数是否精确（缓存或估算时为 false）"
+    )
     items: list[GroupInfo] = Field(..., description="组列表")
+    next_cursor: str | None = Field(
+        default=None, description="下一页游标，没有更多数据时为 None"
+    )
 
 
 # ========== 权限相关 ==========
@@ -244,14 +279,22 @@ class ScopeDetailResponse(ScopeInfo):
     """权限详情响应"""
 
     groups: list[GroupInfo] = Field(default=[], description="拥有此权限的组列表")
-    users: list[UserInfo] = Field(default=[], description="拥有此权限的用户列表")
+    user_count: int = Field(
+        default=0, description="拥有此权限的用户数（列表见 /scope/{id}/users）"
+    )
 
 
 class ScopeListResponse(BaseModel):
     """权限列表响应"""
 
     total: int = Field(..., description="总数")
+    total_exact: bool = Field(
+        default=True, description="总数是否精确（缓存或估算时为 false）"
+    )
     items: list[ScopeInfo] = Field(..., description="权限列表")
+    next_cursor: str | None = Field(
+        default=None, description="下一页游标，没有更多数据时为 None"
+    )
 
 
 # ========== 关联相关 ==========
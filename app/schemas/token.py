@@ -6,10 +6,31 @@ class AccessTokenPayload(BaseModel):
     exp: float = Field(..., description="过期时间戳")
     scope: list[str] = Field(..., description="权限列表")
     typ: str = Field(..., description="令牌类型")
+    gen: int = Field(default=0, description="签发时的用户令牌代数")
 
 
 class RefreshTokenPayload(BaseModel):
     sub: int = Field(..., description="用户ID")
+    iat: float | None = Field(default=None, description="签发时间戳")
     exp: float = Field(..., description="过期时间戳")
     jti: str = Field(..., description="令牌唯一标识")
     typ: str = Field(..., description="令牌类型")
+
+
+class VerifyAccessTokensRequest(BaseModel):
+    tokens: list[str] = Field(..., max_length=1000, description="访问令牌列表")
+
+
+class VerifyAccessTokenResult(BaseModel):
+    payload: AccessTokenPayload | None = Field(
+        default=None, description="令牌内容，验证失败时为空"
+    )
+    code: int | None = Field(default=None, description="错误码，验证成功时为空")
+    exc_type: str | None = Field(default=None, description="错误类型")
+    message: str | None = Field(default=None, description="错误信息")
+
+
+class VerifyAccessTokensResponse(BaseModel):
+    results: list[VerifyAccessTokenResult] = Field(
+        ..., description="验证结果，与请求中的令牌一一对应"
+    )
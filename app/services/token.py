@@ -1,38 +1,212 @@
 """令牌认证"""
 
+import asyncio
+import hashlib
+import time
 import uuid
+from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Annotated
+from pathlib import Path
+from typing import Annotated, Any
 
 import jwt
 from fastapi import Cookie, Depends, Header
 from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.config import CFG
+from app.config import CFG, CONFIG_FILES, AuthCfg, RetiredKeyCfg, load_cfg
 from app.exceptions import auth as auth_error
 from app.repositories import token as token_repo
+from app.repositories import token_epoch as token_epoch_repo
 from app.schemas import token as token_schema
-from app.utils import context, db
+from app.utils import context, db, metrics
+from app.utils.cache import TTLCache
+from app.utils.log import logger
+
+DEFAULT_KID = "default"  # 未携带 kid 的历史令牌按此 kid 验证
+
+
+@dataclass
+class _Key:
+    """已解析的密钥"""
+
+    kid: str
+    algorithm: str
+    signing_key: Any | None  # 签名密钥，旧密钥为 None
+    verifying_key: Any  # 验签密钥
+    not_after: datetime | None = None  # 验签截止时间，None 为不限
+
+    def is_valid(self) -> bool:
+        return self.not_after is None or datetime.now() < self.not_after
+
+
+def _read_key(algorithm: Any, path: str) -> Any:
+    """读取并解析 PEM 密钥文件"""
+    return algorithm.prepare_key(Path(path).read_text())
+
+
+class KeyRing:
+    """签名密钥环
+
+    使用当前密钥签名并在令牌头部写入 kid，验签时按 kid 选择密钥，
+    已轮换的旧密钥在 not_after 之前仍可验签，从而实现密钥平滑轮换
+    """
+
+    def __init__(self, cfg: AuthCfg) -> None:
+        self.active = self._load_active(cfg)
+        self.keys = {self.active.kid: self.active}
+        for retired in cfg.retired_keys:
+            if retired.kid in self.keys:
+                raise ValueError(f"密钥 kid 重复: {retired.kid}")
+            self.keys[retired.kid] = self._load_retired(retired)
+        # 涉及的密钥文件，用于检测变更
+        self.files = [
+            Path(p)
+            for p in [cfg.private_key, cfg.public_key]
+            + [k.public_key for k in cfg.retired_keys]
+            if p
+        ]
+
+    @staticmethod
+    def _load_active(cfg: AuthCfg) -> _Key:
+        """加载当前签名密钥"""
+        algorithm = jwt.get_algorithm_by_name(cfg.algorithm)
+        # 对称算法：签名和验签使用同一密钥
+        if isinstance(algorithm, jwt.algorithms.HMACAlgorithm):
+            key = algorithm.prepare_key(cfg.secret_key)
+            return _Key(cfg.kid, cfg.algorithm, key, key)
+        # 非对称算法：私钥签名，公钥验签
+        if not cfg.private_key:
+            raise ValueError(f"{cfg.algorithm} 需要配置 auth.private_key")
+        private_key = _read_key(algorithm, cfg.private_key)
+        if cfg.public_key:
+            public_key = _read_key(algorithm, cfg.public_key)
+        else:
+            public_key = private_key.public_key()
+        return _Key(cfg.kid, cfg.algorithm, private_key, public_key)
+
+    @staticmethod
+    def _load_retired(cfg: RetiredKeyCfg) -> _Key:
+        """加载已轮换的旧密钥（仅验签）"""
+        algorithm = jwt.get_algorithm_by_name(cfg.algorithm)
+        if isinstance(algorithm, jwt.algorithms.HMACAlgorithm):
+            if not cfg.secret_key:
+                raise ValueError(f"旧密钥 {cfg.kid} 需要配置 secret_key")
+            key = algorithm.prepare_key(cfg.secret_key)
+        else:
+            if not cfg.public_key:
+                raise ValueError(f"旧密钥 {cfg.kid} 需要配置 public_key")
+            key = _read_key(algorithm, cfg.public_key)
+        return _Key(cfg.kid, cfg.algorithm, None, key, cfg.not_after)
+
+    def encode(self, payload: dict) -> str:
+        """使用当前密钥签名"""
+        return jwt.encode(
+            payload,
+            self.active.signing_key,
+            self.active.algorithm,
+            headers={"kid": self.active.kid},
+        )
+
+    def decode(self, token: str) -> dict:
+        """按 kid 选择仍有效的密钥验签"""
+        kid = jwt.get_unverified_header(token).get("kid", DEFAULT_KID)
+        key = self.keys.get(kid)
+        if key is None or not key.is_valid():
+            raise jwt.exceptions.InvalidTokenError(f"未知或已失效的密钥: {kid}")
+        return jwt.decode(token, key.verifying_key, [key.algorithm])
+
+    def jwks(self) -> dict:
+        """获取仍有效的非对称公钥集合（JWKS）"""
+        keys = []
+        for key in self.keys.values():
+            algorithm = jwt.get_algorithm_by_name(key.algorithm)
+            if isinstance(algorithm, jwt.algorithms.HMACAlgorithm):
+                continue  # 对称密钥不公开
+            if not key.is_valid():
+                continue
+            jwk = algorithm.to_jwk(key.verifying_key, as_dict=True)
+            jwk.update({"kid": key.kid, "use": "sig", "alg": key.algorithm})
+            keys.append(jwk)
+        return {"keys": keys}
+
+
+_KEYRING: KeyRing | None = None  # 密钥环，首次使用时加载
+_KEYRING_FINGERPRINT: tuple = ()  # 加载时配置文件和密钥文件的修改时间
+_KEYRING_CHECKED_AT = 0.0  # 上次检查配置变更的时间
+
+
+_refresh_index_skip = metrics.counter("refresh_index_skip")  # 跳过数据库校验次数
+_refresh_index_fallback = metrics.counter("refresh_index_fallback")  # 回查数据库次数
+
+# 已验证访问令牌缓存：sha256(token) -> AccessTokenPayload
+_TOKEN_CACHE = TTLCache(
+    "token_cache", CFG.auth.token_cache_size, CFG.auth.token_cache_ttl
+)
+
+
+def _fingerprint(files: list[Path]) -> tuple:
+    """获取文件修改时间指纹"""
+    return tuple(f.stat().st_mtime_ns if f.exists() else None for f in files)
+
+
+def reload_keys(cfg: AuthCfg | None = None) -> None:
+    """重新加载密钥环
+
+    Args:
+        cfg: 认证配置，为 None 则重新读取配置文件
+    """
+    global _KEYRING, _KEYRING_FINGERPRINT, _KEYRING_CHECKED_AT
+    keyring = KeyRing(cfg or load_cfg(reload=True).auth)
+    _KEYRING = keyring
+    _TOKEN_CACHE.clear()  # 密钥变更后已缓存的验证结果可能失效
+    _KEYRING_FINGERPRINT = _fingerprint(CONFIG_FILES + keyring.files)
+    _KEYRING_CHECKED_AT = time.monotonic()
+
+
+def _get_keyring() -> KeyRing:
+    """获取密钥环，按间隔检查配置变更并热加载"""
+    global _KEYRING_CHECKED_AT
+    if _KEYRING is None:
+        reload_keys(CFG.auth)
+        return _KEYRING
+    interval = CFG.auth.keys_reload_interval
+    if interval > 0 and time.monotonic() - _KEYRING_CHECKED_AT > interval:
+        _KEYRING_CHECKED_AT = time.monotonic()
+        if _fingerprint(CONFIG_FILES + _KEYRING.files) != _KEYRING_FINGERPRINT:
+            try:
+                reload_keys()
+                logger.info("Signing keys reloaded", kid=_KEYRING.active.kid)
+            except Exception:
+                # 新配置有误时继续使用旧密钥环
+                logger.exception("Signing keys reload failed")
+    return _KEYRING
+
+
+def get_jwks() -> dict:
+    """获取公钥集合（JWKS），对称密钥不公开"""
+    return _get_keyring().jwks()
 
 
 def _generate_refresh_token(user_id: int) -> tuple:
     """生成刷新令牌"""
     jti = str(uuid.uuid4())  # JWT ID
-    expire = datetime.now() + timedelta(
+    now = datetime.now()
+    expire = now + timedelta(
         days=CFG.auth.refresh_token_expire_days
     )  # 刷新令牌过期时间
     payload = {
         "sub": str(user_id),
+        "iat": now.timestamp(),
         "exp": expire.timestamp(),
         "jti": jti,
         "typ": "refresh",
     }
-    token = jwt.encode(payload, CFG.auth.secret_key, CFG.auth.algorithm)
+    token = _get_keyring().encode(payload)
     return jti, expire, token
 
 
-def _generate_access_token(user_id: int, scopes: list[str]) -> str:
+def _generate_access_token(user_id: int, scopes: list[str], gen: int = 0) -> str:
     """生成访问令牌"""
     expire = datetime.now() + timedelta(
         minutes=CFG.auth.access_token_expire_minutes
@@ -42,8 +216,9 @@ def _generate_access_token(user_id: int, scopes: list[str]) -> str:
         "exp": expire.timestamp(),
         "scope": " ".join(scopes),
         "typ": "access",
+        "gen": gen,
     }
-    token = jwt.encode(payload, CFG.auth.secret_key, CFG.auth.algorithm)
+    token = _get_keyring().encode(payload)
     return token
 
 
@@ -57,8 +232,9 @@ async def create_token(
     # 存储刷新令牌
     await token_repo.create(db_session, jti, user_id, expire)
 
-    # 生成访问令牌
-    a_token = _generate_access_token(user_id, scopes)
+    # 生成访问令牌，携带用户当前令牌代数
+    gen = await token_epoch_repo.get(db_session, user_id)
+    a_token = _generate_access_token(user_id, scopes, gen)
 
     return {
         "access_token": a_token,
@@ -70,7 +246,7 @@ async def create_token(
 # --- 验证访问令牌 ---
 
 
-def _get_access_token(
+async def _get_access_token(
     authorization: Annotated[str | None, Header()] = None,  # 从请求头获取 Bearer token
 ) -> str | None:
     """从请求头获取 Bearer token"""
@@ -79,21 +255,44 @@ def _get_access_token(
     return authorization.replace("Bearer ", "")
 
 
-def _decode_access_token(
-    access_token: Annotated[str, Depends(_get_access_token)],
+def decode_access_token(access_token: str) -> token_schema.AccessTokenPayload:
+    """解析访问令牌（优先使用已验证令牌缓存）
+
+    令牌代数在缓存之外检查，撤销用户所有令牌后缓存中的令牌也立即失效
+    """
+    cache_key = hashlib.sha256(access_token.encode()).digest()
+    payload = _TOKEN_CACHE.get(cache_key)
+    if payload is None:
+        payload = _decode_access_token_uncached(access_token)
+        # 缓存过期时间不晚于令牌过期时间
+        _TOKEN_CACHE.set(cache_key, payload, ttl=payload.exp - time.time())
+    if not token_epoch_repo.is_current(payload.sub, payload.gen):
+        raise auth_error.InvalidAccessTokenError  # 用户令牌已被全部撤销
+    return payload
+
+
+def _decode_access_token_uncached(
+    access_token: str,
 ) -> token_schema.AccessTokenPayload:
-    """解析访问令牌"""
+    """校验签名并解析访问令牌"""
     try:
-        payload = jwt.decode(access_token, CFG.auth.secret_key, [CFG.auth.algorithm])
+        payload = _get_keyring().decode(access_token)
         payload["scope"] = payload["scope"].split()
         payload = token_schema.AccessTokenPayload(**payload)
         if payload.typ != "access":
             raise auth_error.InvalidAccessTokenError  # token 类型不正确
-        return payload
     except jwt.ExpiredSignatureError:
         raise auth_error.ExpiredAccessTokenError  # 访问令牌过期
-    except jwt.exceptions.InvalidTokenError or ValidationError:
+    except (jwt.exceptions.InvalidTokenError, ValidationError):
         raise auth_error.InvalidAccessTokenError  # 访问令牌无效
+    return payload
+
+
+async def _decode_access_token(
+    access_token: Annotated[str, Depends(_get_access_token)],
+) -> token_schema.AccessTokenPayload:
+    """解析访问令牌"""
+    return decode_access_token(access_token)
 
 
 async def authenticate_access_token(
@@ -105,6 +304,14 @@ async def authenticate_access_token(
     return payload
 
 
+async def authenticate_authorization(
+    authorization: str | None,
+) -> token_schema.AccessTokenPayload:
+    """验证 Authorization 请求头中的访问令牌（不经依赖注入，供网关认证使用）"""
+    access_token = await _get_access_token(authorization)
+    return await authenticate_access_token(decode_access_token(access_token))
+
+
 # --- 验证刷新令牌 ---
 
 
@@ -113,14 +320,14 @@ def _decode_refresh_token(
 ) -> token_schema.RefreshTokenPayload:
     """解析刷新令牌"""
     try:
-        payload = jwt.decode(refresh_token, CFG.auth.secret_key, [CFG.auth.algorithm])
+        payload = _get_keyring().decode(refresh_token)
         payload = token_schema.RefreshTokenPayload(**payload)
         if payload.typ != "refresh":
             raise auth_error.InvalidRefreshTokenError  # token 类型不正确
         return payload
     except jwt.ExpiredSignatureError:
         raise auth_error.ExpiredRefreshTokenError  # 刷新令牌过期
-    except jwt.exceptions.InvalidTokenError or ValidationError:
+    except (jwt.exceptions.InvalidTokenError, ValidationError):
         raise auth_error.InvalidRefreshTokenError  # 刷新令牌无效
 
 
@@ -128,12 +335,25 @@ async def authenticate_refresh_token(
     payload: Annotated[
         token_schema.RefreshTokenPayload, Depends(_decode_refresh_token)
     ],
-    db_session: Annotated[AsyncSession, Depends(db.get_auth_db)],
+    db_session: Annotated[AsyncSession, Depends(db.get_auth_db, scope="function")],
 ) -> token_schema.RefreshTokenPayload:
-    """验证刷新令牌"""
+    """验证刷新令牌
+
+    签名和过期时间已在解析时校验，未命中进程内撤销索引的令牌直接通过，
+    可能已撤销的令牌再查询数据库确认。刷新和登出时撤销旧令牌的条件更新
+    会再次校验令牌状态，避免其他进程撤销的令牌被重复使用
+    """
     # 设置 user_id 到 ContextVar
     context.user_id_ctx.set(str(payload.sub))
 
+    # 常规路径：未命中撤销索引，跳过数据库查询
+    if not token_repo.REVOCATION_INDEX.maybe_revoked(
+        payload.jti, payload.sub, payload.iat
+    ):
+        _refresh_index_skip.inc()
+        return payload
+    _refresh_index_fallback.inc()
+
     # 验证刷新令牌是否在数据库中且未撤销
     token_record = await token_repo.get_by_jti(
         db_session, payload.jti, int(payload.sub)
@@ -150,3 +370,18 @@ async def authenticate_refresh_token(
         raise auth_error.ExpiredRefreshTokenError  # 刷新令牌过期
 
     return payload
+
+
+# --- 同步令牌代数 ---
+
+
+async def sync_token_epochs() -> None:
+    """周期性地从数据库增量同步用户令牌代数，使其他进程的强制下线在本进程生效"""
+    while True:
+        try:
+            async for db_session in db.get_auth_db():
+                await token_epoch_repo.sync(db_session)
+        except Exception:
+            # 数据库暂时不可用时保留已同步的代数，下个周期重试
+            logger.exception("Token epoch sync failed")
+        await asyncio.sleep(CFG.auth.token_epoch_sync_interval)
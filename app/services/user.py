@@ -1,15 +1,199 @@
 """用户管理"""
 
-from pwdlib._hash import PasswordHash
+import asyncio
+import codecs
+import csv
+import json
+from collections.abc import AsyncIterable, AsyncIterator
+from typing import Literal
+
+from pydantic import ValidationError
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.entities.auth import User
+from app.repositories import relation as relation_repo
+from app.repositories import user as user_repo
+from app.repositories.user import UserCredential
+from app.schemas import admin as admin_schema
+from app.utils import hasher
 
-passwd_hash = PasswordHash.recommended()
-HASHED_DUMMY_PASSWORD = passwd_hash.hash("dummy_password")
+HASHED_DUMMY_PASSWORD = hasher.passwd_hash.hash("dummy_password")
+IMPORT_BATCH_SIZE = 500  # 批量导入时每批写入的用户数
 
 
-def verify_password(user: User, password: str) -> bool:
-    """验证密码"""
+async def verify_password(user: User | UserCredential | None, password: str) -> bool:
+    """验证密码（在哈希进程池中执行）"""
     # 使用 dummy_password 避免时序攻击
     target_hash = user.password_hash if user else HASHED_DUMMY_PASSWORD
-    return passwd_hash.verify(password, target_hash)
+    return await hasher.verify_password(password, target_hash)
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """将字节流按行解码为文本（UTF-8，兼容 BOM 和 CRLF）"""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def _iter_rows(
+    lines: AsyncIterable[str], file_format: Literal["csv", "ndjson"]
+) -> AsyncIterator[tuple[int, dict | None]]:
+    """逐行解析为 (行号, 字段)，无法解析的行字段为 None
+
+    CSV 首行为表头（email,username,password），不支持字段内换行
+    """
+    header = None
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not line.strip():
+            continue
+        if file_format == "csv":
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [value.strip() for value in values]
+                continue
+            yield line_no, dict(zip(header, values))
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_no, row if isinstance(row, dict) else None
+
+
+def _error_message(exc: ValidationError) -> str:
+    """拼接参数校验错误信息"""
+    return "; ".join(
+        f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in exc.errors()
+    )
+
+
+async def _insert_users(
+    db_session: AsyncSession,
+    users: list[tuple[str, str, str]],
+    group_ids: list[int],
+) -> None:
+    """写入用户并加入组后提交"""
+    user_ids = await user_repo.bulk_create(db_session, users)
+    await relation_repo.add_user_group(
+        db_session,
+        [(user_id, group_id) for user_id in user_ids for group_id in group_ids],
+    )
+    # 直接提交而非 db.commit，已导入的批次不受后续批次失败影响
+    await db_session.commit()
+
+
+async def _import_batch(
+    db_session: AsyncSession,
+    batch: list[tuple[int, admin_schema.CreateUserRequest]],
+    group_ids: list[int],
+    result: admin_schema.ImportUsersResponse,
+) -> None:
+    """哈希并写入一批用户，每批单独提交"""
+    # 邮箱按忽略大小写比较，与 MySQL 唯一索引的排序规则一致
+    existing = {
+        email.lower()
+        for email in await user_repo.get_existing_emails(
+            db_session, [body.email for _, body in batch]
+        )
+    }
+    rows = []
+    for line, body in batch:
+        email = body.email.lower()
+        if email in existing:
+            result.errors.append(
+                admin_schema.ImportUserError(
+                    line=line, email=body.email, message="邮箱已被注册"
+                )
+            )
+            continue
+        existing.add(email)
+        rows.append((line, body))
+    if not rows:
+        return
+    # 一次性提交到哈希进程池，由多个进程并行计算
+    hashes = await asyncio.gather(
+        *(hasher.hash_password(body.password) for _, body in rows)
+    )
+    users = [
+        (body.email, body.username, password_hash)
+        for (_, body), password_hash in zip(rows, hashes)
+    ]
+    try:
+        await _insert_users(db_session, users, group_ids)
+        result.created += len(rows)
+        return
+    except IntegrityError:
+        # 并发注册了同一邮箱等冲突，整批回滚后逐行重试，只记录冲突的行
+        await db_session.rollback()
+    for (line, body), user in zip(rows, users):
+        try:
+            await _insert_users(db_session, [user], group_ids)
+        except IntegrityError:
+            await db_session.rollback()
+            result.errors.append(
+                admin_schema.ImportUserError(
+                    line=line, email=body.email, message="写入失败"
+                )
+            )
+            continue
+        result.created += 1
+
+
+async def import_users(
+    db_session: AsyncSession,
+    lines: AsyncIterable[str],
+    file_format: Literal["csv", "ndjson"],
+    group_ids: list[int] | None = None,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> admin_schema.ImportUsersResponse:
+    """流式批量导入用户
+
+    逐行按创建用户的规则校验，每攒够一批并行计算密码哈希后批量插入并加入指定组。
+    单行校验失败或邮箱已注册只记录该行错误，不中断导入
+
+    Args:
+        db_session: 数据库会话
+        lines: 文本行（CSV 或 NDJSON）
+        file_format: 文件格式
+        group_ids: 新用户加入的组 ID
+        batch_size: 每批写入的用户数
+
+    Returns:
+        导入结果
+    """
+    result = admin_schema.ImportUsersResponse()
+    batch = []
+    async for line, row in _iter_rows(lines, file_format):
+        if row is None:
+            result.errors.append(
+                admin_schema.ImportUserError(line=line, message="格式错误")
+            )
+            continue
+        try:
+            body = admin_schema.CreateUserRequest.model_validate(row)
+        except ValidationError as exc:
+            result.errors.append(
+                admin_schema.ImportUserError(
+                    line=line, email=row.get("email"), message=_error_message(exc)
+                )
+            )
+            continue
+        batch.append((line, body))
+        if len(batch) >= batch_size:
+            await _import_batch(db_session, batch, group_ids or [], result)
+            batch = []
+    if batch:
+        await _import_batch(db_session, batch, group_ids or [], result)
+    result.errors.sort(key=lambda error: error.line)
+    result.failed = len(result.errors)
+    return result
@@ -1 +1 @@
-from . import context, db, log
+from . import cache, context, db, hasher, log, metrics
@@ -0,0 +1,65 @@
+"""进程内缓存"""
+
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+from app.utils import metrics
+
+
+class TTLCache:
+    """带过期时间的 LRU 缓存
+
+    超过容量时淘汰最久未使用的条目，命中/未命中次数记录到指标 {name}_hit / {name}_miss，
+    非线程安全，仅在事件循环中使用
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize  # 最大条目数，0 为禁用缓存
+        self.ttl = ttl  # 默认过期时间（秒）
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._hits = metrics.counter(f"{name}_hit")
+        self._misses = metrics.counter(f"{name}_miss")
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """获取未过期的缓存值"""
+        item = self._data.get(key)
+        if item is not None:
+            expire_at, value = item
+            if expire_at > time.monotonic():
+                self._data.move_to_end(key)
+                self._hits.inc()
+                return value
+            del self._data[key]
+        self._misses.inc()
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """写入缓存
+
+        Args:
+            key: 缓存键
+            value: 缓存值
+            ttl: 过期时间（秒），为 None 则使用默认值，不超过默认值
+        """
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """删除缓存"""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """清空缓存"""
+        self._data.clear()
@@ -1,8 +1,10 @@
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Callable
 
+from sqlalchemy.dialects import mysql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.config import CFG, MySQLCfg, SQLiteCfg
+from app.entities.auth import Base
 
 ENGINES = {}  # 存储数据库引擎的字典，键为数据库名称
 SESSION_MAKERS = {}  # 存储会话工厂的字典，键为数据库名称
@@ -17,6 +19,18 @@ ENGINE_KWARGS_MAP = {
     },
     "sqlite": {"echo": False},
 }  # 数据库引擎配置
+UNIT_OF_WORK = "unit_of_work"  # 会话 info 键：是否处于工作单元模式
+AFTER_COMMIT = "after_commit"  # 会话 info 键：事务提交后的回调列表
+
+
+def _enable_eager_defaults() -> None:
+    """插入/更新时在 flush 内取回服务端默认值（自增 ID、create_at 等）
+
+    支持 RETURNING 的数据库（SQLite）随 INSERT 一并返回，其他数据库（MySQL）在 flush
+    内补一次按主键的查询，数据访问函数创建对象后无需再 refresh
+    """
+    for mapper in Base.registry.mappers:
+        mapper.eager_defaults = True
 
 
 def _get_db_url(cfg, db_driver: str):
@@ -53,22 +67,67 @@ def _get_session_maker(name: str, db_url: str, db_driver: str):
 
 
 def get_db(name: str, db_url: str, db_driver: str):
-    """获取数据库会话依赖函数"""
+    """获取数据库会话依赖函数
+
+    会话处于工作单元模式：数据访问函数只 flush，依赖在请求处理完成后统一提交一次，
+    出现异常时回滚。路由中应以 Depends(..., scope="function") 使用，使提交在响应
+    发送前完成，提交失败时返回错误
+    """
 
     async def _get_db() -> AsyncGenerator[AsyncSession, None]:
         session_maker = _get_session_maker(name, db_url, db_driver)
         # 创建数据库会话上下文管理器
         async with session_maker() as db_session:
+            db_session.info[UNIT_OF_WORK] = True
             try:
                 # 向调用方yield会话
                 yield db_session
+                await db_session.commit()
+            except BaseException:
+                await db_session.rollback()
+                raise
             finally:
                 # 确保会话被正确关闭
                 await db_session.close()
+            # 事务提交后执行回调
+            for callback in db_session.info.pop(AFTER_COMMIT, []):
+                callback()
 
     return _get_db
 
 
+async def commit(db_session: AsyncSession) -> None:
+    """提交事务，工作单元模式下只 flush，由会话依赖统一提交"""
+    if db_session.info.get(UNIT_OF_WORK):
+        await db_session.flush()
+    else:
+        await db_session.commit()
+
+
+def after_commit(db_session: AsyncSession, callback: Callable[[], None]) -> None:
+    """注册事务提交后的回调（如失效进程内缓存），非工作单元模式下立即执行
+
+    Args:
+        db_session: 数据库会话
+        callback: 无参回调函数，事务回滚时不执行
+    """
+    if db_session.info.get(UNIT_OF_WORK):
+        db_session.info.setdefault(AFTER_COMMIT, []).append(callback)
+    else:
+        callback()
+
+
+def insert(db_session: AsyncSession, entity):
+    """创建当前数据库方言的 INSERT 语句，以便使用 upsert 等方言特性"""
+    match db_session.bind.dialect.name:
+        case "mysql":
+            return mysql.insert(entity)
+        case "sqlite":
+            return sqlite.insert(entity)
+        case name:
+            raise ValueError(f"不支持的数据库方言: {name}")
+
+
 async def close_all():
     """关闭所有数据库引擎"""
     for engine in ENGINES.values():
@@ -77,6 +136,8 @@ async def close_all():
     SESSION_MAKERS.clear()
 
 
+_enable_eager_defaults()
+
 # 创建认证数据库的依赖函数
 get_auth_db = get_db(
     "auth",
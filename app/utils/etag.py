@@ -0,0 +1,49 @@
+"""条件请求（ETag / If-None-Match）
+
+ETag 由决定响应内容的值（相关表的版本号、当前用户等）和请求路径、查询参数生成，
+客户端带回仍然匹配的 ETag 时直接返回 304，跳过后续的查询和序列化。
+路由先读版本号再读数据，两者之间发生的写入只会让 ETag 偏旧（下次请求不匹配而重新获取），
+不会让旧内容带上新的 ETag
+"""
+
+import hashlib
+
+from fastapi import Request, Response, status
+
+CACHE_CONTROL = "private, no-cache"  # 只允许客户端缓存，每次使用前重新验证
+
+
+def make(request: Request, *parts) -> str:
+    """生成弱 ETag"""
+    key = repr((request.url.path, request.url.query, parts)).encode()
+    return f'W/"{hashlib.blake2b(key, digest_size=12).hexdigest()}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    """按弱比较判断 If-None-Match 是否包含 ETag"""
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(",")
+    )
+
+
+def check(request: Request, response: Response, *parts) -> Response | None:
+    """生成 ETag 并处理 If-None-Match
+
+    Args:
+        request: 请求
+        response: 路由的临时响应，用于写入 ETag 响应头
+        parts: 决定响应内容的值（表版本号、当前用户 ID 等）
+
+    Returns:
+        ETag 匹配时返回 304 响应，否则写入响应头并返回 None
+    """
+    etag = make(request, *parts)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match and _matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return None
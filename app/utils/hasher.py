@@ -0,0 +1,89 @@
+"""密码哈希进程池
+
+argon2 的哈希和校验是 CPU 密集操作，直接在协程中调用会阻塞事件循环，
+因此统一提交到独立的进程池中执行
+"""
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from pwdlib._hash import PasswordHash
+
+from app.config import CFG
+from app.utils import metrics
+
+passwd_hash = PasswordHash.recommended()
+EXECUTOR: ProcessPoolExecutor | None = None  # 进程池，首次使用时创建
+
+_in_flight = metrics.gauge("hasher_in_flight")  # 已提交未完成的任务数
+_queue_depth = metrics.gauge("hasher_queue_depth")  # 排队等待空闲进程的任务数
+_wait_ms = metrics.summary("hasher_wait_ms")  # 排队及进程间通信耗时
+_exec_ms = metrics.summary("hasher_exec_ms")  # 进程内哈希计算耗时
+
+
+def _hash(password: str) -> tuple[str, float]:
+    """（子进程）计算密码哈希，同时返回计算耗时"""
+    start = time.perf_counter()
+    password_hash = passwd_hash.hash(password)
+    return password_hash, (time.perf_counter() - start) * 1000
+
+
+def _verify(password: str, password_hash: str) -> tuple[bool, float]:
+    """（子进程）校验密码，同时返回计算耗时"""
+    start = time.perf_counter()
+    ok = passwd_hash.verify(password, password_hash)
+    return ok, (time.perf_counter() - start) * 1000
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    """获取或创建进程池"""
+    global EXECUTOR
+    if EXECUTOR is None:
+        EXECUTOR = ProcessPoolExecutor(
+            max_workers=CFG.hasher.max_workers,
+            # 使用 spawn 避免 fork 时复制事件循环、日志线程等运行状态
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return EXECUTOR
+
+
+def _update_queue_depth() -> None:
+    """根据在途任务数更新排队深度"""
+    _queue_depth.set(max(0, _in_flight.value - CFG.hasher.max_workers))
+
+
+async def _submit(fn, *args):
+    """提交任务到进程池并记录排队深度与等待时间"""
+    loop = asyncio.get_running_loop()
+    _in_flight.inc()
+    _update_queue_depth()
+    start = time.perf_counter()
+    try:
+        result, exec_ms = await loop.run_in_executor(_get_executor(), fn, *args)
+    finally:
+        _in_flight.dec()
+        _update_queue_depth()
+    total_ms = (time.perf_counter() - start) * 1000
+    _exec_ms.observe(exec_ms)
+    _wait_ms.observe(max(0.0, total_ms - exec_ms))
+    return result
+
+
+async def hash_password(password: str) -> str:
+    """计算密码哈希"""
+    return await _submit(_hash, password)
+
+
+async def verify_password(password: str, password_hash: str) -> bool:
+    """校验密码"""
+    return await _submit(_verify, password, password_hash)
+
+
+def shutdown() -> None:
+    """关闭进程池"""
+    global EXECUTOR
+    if EXECUTOR is not None:
+        EXECUTOR.shutdown()
+        EXECUTOR = None
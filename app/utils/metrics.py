@@ -0,0 +1,107 @@
+"""进程内运行指标"""
+
+import time
+
+
+class Counter:
+    """计数器"""
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def inc(self, n: int = 1) -> None:
+        self.value += n
+
+    def snapshot(self) -> int:
+        return self.value
+
+
+class Gauge:
+    """瞬时值"""
+
+    def __init__(self) -> None:
+        self.value = 0
+
+    def set(self, value: int) -> None:
+        self.value = value
+
+    def inc(self, n: int = 1) -> None:
+        self.value += n
+
+    def dec(self, n: int = 1) -> None:
+        self.value -= n
+
+    def snapshot(self) -> int:
+        return self.value
+
+
+class Summary:
+    """观测值汇总（次数、平均值、最大值）"""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def snapshot(self) -> dict:
+        avg = self.total / self.count if self.count else 0.0
+        return {"count": self.count, "avg": round(avg, 3), "max": round(self.max, 3)}
+
+
+class PhaseTimer:
+    """分阶段计时，各阶段耗时（毫秒）记录到汇总 {prefix}_{phase}_ms"""
+
+    def __init__(self, prefix: str) -> None:
+        self.prefix = prefix
+        self.phases: dict[str, float] = {}  # 阶段名 -> 耗时（毫秒）
+        self._last = time.perf_counter()
+
+    def lap(self, phase: str) -> None:
+        """结束当前阶段并开始下一阶段"""
+        now = time.perf_counter()
+        ms = (now - self._last) * 1000
+        self._last = now
+        self.phases[phase] = round(ms, 3)
+        summary(f"{self.prefix}_{phase}_ms").observe(ms)
+
+    def server_timing(self) -> str:
+        """格式化为 Server-Timing 响应头"""
+        return ", ".join(f"{phase};dur={ms}" for phase, ms in self.phases.items())
+
+
+METRICS: dict[str, Counter | Gauge | Summary] = {}  # 指标名 -> 指标对象
+
+
+def _get_or_create(name: str, cls):
+    """获取或创建指标"""
+    if name not in METRICS:
+        METRICS[name] = cls()
+    metric = METRICS[name]
+    assert isinstance(metric, cls), f"指标 {name} 类型冲突"
+    return metric
+
+
+def counter(name: str) -> Counter:
+    """获取或创建计数器"""
+    return _get_or_create(name, Counter)
+
+
+def gauge(name: str) -> Gauge:
+    """获取或创建瞬时值"""
+    return _get_or_create(name, Gauge)
+
+
+def summary(name: str) -> Summary:
+    """获取或创建汇总"""
+    return _get_or_create(name, Summary)
+
+
+def snapshot() -> dict:
+    """导出所有指标当前值"""
+    return {name: metric.snapshot() for name, metric in sorted(METRICS.items())}
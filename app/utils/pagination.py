@@ -0,0 +1,37 @@
+"""游标分页
+
+列表按 ID 倒序排列，游标为上一页最后一条记录 ID 的不透明编码，下一页只查询更小的 ID，
+通过主键索引直接定位，任意页的查询代价与第一页相同
+"""
+
+import base64
+import binascii
+
+from app.exceptions.base import InvalidCursorError
+
+
+def encode_cursor(last_id: int) -> str:
+    """编码游标"""
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str | None) -> int | None:
+    """解码游标，为 None 时返回 None
+
+    Raises:
+        InvalidCursorError: 游标格式错误
+    """
+    if cursor is None:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursorError from None
+
+
+def next_cursor(ids: list[int], limit: int) -> str | None:
+    """根据本页记录 ID 生成下一页游标，不足一页说明没有更多数据，返回 None"""
+    if len(ids) < limit or not ids:
+        return None
+    return encode_cursor(ids[-1])
@@ -0,0 +1,19 @@
+"""JSON 响应渲染
+
+声明了返回类型的路由由 FastAPI 通过返回类型的 TypeAdapter 直接序列化为 JSON 字节
+（pydantic-core 一次完成，不经过 jsonable_encoder 和 json.dumps），前提是路由和应用
+都不设置 response_class / default_response_class，否则退回先转 dict 再编码的慢路径。
+其余直接构造的 JSON 响应（异常处理器等）使用 FastJSONResponse
+"""
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+
+class FastJSONResponse(JSONResponse):
+    """使用 pydantic-core 序列化的 JSON 响应（输出与 JSONResponse 一致）"""
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
@@ -0,0 +1,95 @@
+"""响应渲染微基准
+
+对比列表接口（1000 条用户）的响应构造与序列化吞吐，两者都和 FastAPI 一样由返回
+类型的 TypeAdapter 直接序列化为 JSON 字节：
+- before: 逐条校验构造，create_at 用 strftime 格式化
+- after: 逐条校验构造，create_at 用 isoformat 格式化
+
+令牌验证接口的构造和序列化路径没有变化，不在对比之列
+
+用法: uv run -m benchmarks.bench_response [--number N]
+"""
+
+import argparse
+import time
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from pydantic import TypeAdapter
+
+from app.schemas import admin as admin_schema
+
+
+class UserRow(NamedTuple):
+    """模拟 columns.USER_INFO 查询结果"""
+
+    id: int
+    email: str
+    name: str
+    yn: int
+    create_at: datetime
+
+
+def _rows(n: int) -> list[UserRow]:
+    start = datetime(2026, 1, 1)
+    return [
+        UserRow(i, f"user{i}@example.com", f"用户{i}", 1, start + timedelta(minutes=i))
+        for i in range(n, 0, -1)
+    ]
+
+
+def _baseline_user_info(row: UserRow) -> admin_schema.UserInfo:
+    """优化前的构造方式"""
+    return admin_schema.UserInfo(
+        id=row.id,
+        email=row.email,
+        username=row.name,
+        yn=row.yn,
+        create_at=row.create_at.strftime("%Y-%m-%d %H:%M:%S"),
+    )
+
+
+def _bench(number: int, *fns) -> list[float]:
+    """返回各函数每秒执行次数（交替执行 5 轮取最好成绩，减少机器负载波动的影响）"""
+    best = [float("inf")] * len(fns)
+    for _ in range(5):
+        for i, fn in enumerate(fns):
+            start = time.perf_counter()
+            for _ in range(number):
+                fn()
+            best[i] = min(best[i], time.perf_counter() - start)
+    return [number / elapsed for elapsed in best]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="响应渲染微基准")
+    parser.add_argument("--number", type=int, default=200, help="每轮执行次数")
+    args = parser.parse_args()
+
+    rows = _rows(1000)
+    list_adapter = TypeAdapter(admin_schema.UserListResponse)
+
+    def list_before() -> bytes:
+        items = [_baseline_user_info(row) for row in rows]
+        return list_adapter.dump_json(
+            admin_schema.UserListResponse(total=1000, items=items)
+        )
+
+    def list_after() -> bytes:
+        items = [admin_schema.UserInfo.from_user(row) for row in rows]
+        return list_adapter.dump_json(
+            admin_schema.UserListResponse(total=1000, items=items)
+        )
+
+    cases = [("list_users (1000 items)", list_before, list_after, args.number)]
+    print(f"{'endpoint':<26}{'before ops/s':>14}{'after ops/s':>14}{'speedup':>10}")
+    for name, before, after, number in cases:
+        before_ops, after_ops = _bench(number, before, after)
+        print(
+            f"{name:<26}{before_ops:>14.1f}{after_ops:>14.1f}"
+            f"{after_ops / before_ops:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
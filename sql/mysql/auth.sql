@@ -1,6 +1,9 @@
 SET GLOBAL time_zone = '+08:00';
 SET SESSION time_zone = '+08:00';
+DROP TABLE IF EXISTS `table_version`;
 DROP TABLE IF EXISTS `email_code`;
+DROP TABLE IF EXISTS `token_epoch`;
+DROP TABLE IF EXISTS `user_scope`;
 DROP TABLE IF EXISTS `refresh_token`;
 DROP TABLE IF EXISTS `group_user_rel`;
 DROP TABLE IF EXISTS `group_scope_rel`;
@@ -13,14 +16,16 @@ CREATE TABLE `scope` (
     `name` VARCHAR(100) NOT NULL UNIQUE COMMENT '权限范围名称',
     `description` VARCHAR(100) DEFAULT NULL COMMENT '权限范围描述',
     `create_at` DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
-    `yn` TINYINT NOT NULL DEFAULT 1 COMMENT '是否启用'
+    `yn` TINYINT NOT NULL DEFAULT 1 COMMENT '是否启用',
+    FULLTEXT INDEX ft_scope_search (name, description) WITH PARSER ngram
 ) COMMENT '权限范围';
 
 CREATE TABLE `group` (
     `id` INT AUTO_INCREMENT PRIMARY KEY COMMENT '组ID',
     `name` VARCHAR(100) NOT NULL UNIQUE COMMENT '组名称',
     `create_at` DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
-    `yn` TINYINT NOT NULL DEFAULT 1 COMMENT '是否启用'
+    `yn` TINYINT NOT NULL DEFAULT 1 COMMENT '是否启用',
+    FULLTEXT INDEX ft_group_search (name) WITH PARSER ngram
 ) COMMENT '组';
 
 CREATE TABLE `user` (
@@ -30,7 +35,8 @@ CREATE TABLE `user` (
     `password_hash` VARCHAR(500) NOT NULL COMMENT '密码哈希',
     `create_at` DATETIME DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
     `update_at` DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
-    `yn` TINYINT NOT NULL DEFAULT 1 COMMENT '是否启用'
+    `yn` TINYINT NOT NULL DEFAULT 1 COMMENT '是否启用',
+    FULLTEXT INDEX ft_user_search (name, email) WITH PARSER ngram
 ) COMMENT '用户';
 
 CREATE TABLE `group_scope_rel` (
@@ -38,7 +44,8 @@ CREATE TABLE `group_scope_rel` (
     `scope_id` INT NOT NULL COMMENT '权限范围ID',
     PRIMARY KEY (`group_id`, `scope_id`),
     FOREIGN KEY (`group_id`) REFERENCES `group` (`id`),
-    FOREIGN KEY (`scope_id`) REFERENCES `scope` (`id`)
+    FOREIGN KEY (`scope_id`) REFERENCES `scope` (`id`),
+    INDEX idx_group_scope_rel_scope_id (scope_id)
 ) COMMENT '组-权限关系';
 
 CREATE TABLE `group_user_rel` (
@@ -46,7 +53,8 @@ CREATE TABLE `group_user_rel` (
     `user_id` BIGINT NOT NULL COMMENT '用户ID',
     PRIMARY KEY (`group_id`, `user_id`),
     FOREIGN KEY (`group_id`) REFERENCES `group` (`id`),
-    FOREIGN KEY (`user_id`) REFERENCES `user` (`id`)
+    FOREIGN KEY (`user_id`) REFERENCES `user` (`id`),
+    INDEX idx_group_user_rel_user_id (user_id)
 ) COMMENT '组-用户关系';
 
 CREATE TABLE `refresh_token` (
@@ -67,6 +75,63 @@ CREATE TABLE `email_code` (
     `expire_at` DATETIME NOT NULL COMMENT '过期时间',
     `used` TINYINT NOT NULL DEFAULT 0 COMMENT '是否已使用',
     `create_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
-    INDEX idx_email_code_email (email),
+    INDEX idx_email_code_lookup (email, type, used, expire_at),
     INDEX idx_email_code_expire_at (expire_at)
 ) COMMENT '邮箱验证码';
+
+CREATE TABLE `token_epoch` (
+    `user_id` BIGINT NOT NULL PRIMARY KEY COMMENT '用户ID',
+    `epoch` INT NOT NULL DEFAULT 0 COMMENT '令牌代数，撤销用户所有令牌时递增',
+    `update_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '更新时间',
+    INDEX idx_token_epoch_update_at (update_at)
+) COMMENT '用户令牌代数';
+
+CREATE TABLE `user_scope` (
+    `user_id` BIGINT NOT NULL COMMENT '用户ID',
+    `scope_id` INT NOT NULL COMMENT '权限范围ID',
+    PRIMARY KEY (`user_id`, `scope_id`),
+    INDEX idx_user_scope_scope_id (scope_id)
+) COMMENT '用户有效权限（物化已启用组的已启用权限，由关联和启用状态变更增量维护）';
+
+CREATE TABLE `table_version` (
+    `name` VARCHAR(64) NOT NULL PRIMARY KEY COMMENT '表名',
+    `version` BIGINT NOT NULL DEFAULT 0 COMMENT '修改计数'
+) COMMENT '表版本号（被跟踪的表每次插入、更新、删除时由触发器递增，用于生成条件请求的 ETag）';
+
+INSERT INTO `table_version` (`name`) VALUES
+    ('user'), ('group'), ('scope'), ('group_user_rel'), ('group_scope_rel');
+
+CREATE TRIGGER `user_version_insert` AFTER INSERT ON `user` FOR EACH ROW
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'user';
+CREATE TRIGGER `user_version_update` AFTER UPDATE ON `user` FOR EACH ROW
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'user';
+CREATE TRIGGER `user_version_delete` AFTER DELETE ON `user` FOR EACH ROW
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'user';
+
+CREATE TRIGGER `group_version_insert` AFTER INSERT ON `group` FOR EACH ROW
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'group';
+CREATE TRIGGER `group_version_update` AFTER UPDATE ON `group` FOR EACH ROW
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'group';
+CREATE TRIGGER `group_version_delete` AFTER DELETE ON `group` FOR EACH ROW
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'group';
+
+CREATE TRIGGER `scope_version_insert` AFTER INSERT ON `scope` FOR EACH ROW
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'scope';
+CREATE TRIGGER `scope_version_update` AFTER UPDATE ON `scope` FOR EACH ROW
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'scope';
+CREATE TRIGGER `scope_version_delete` AFTER DELETE ON `scope` FOR EACH ROW
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'scope';
+
+CREATE TRIGGER `group_user_rel_version_insert` AFTER INSERT ON `group_user_rel` FOR EACH ROW
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'group_user_rel';
+CREATE TRIGGER `group_user_rel_version_update` AFTER UPDATE ON `group_user_rel` FOR EACH ROW
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'group_user_rel';
+CREATE TRIGGER `group_user_rel_version_delete` AFTER DELETE ON `group_user_rel` FOR EACH ROW
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'group_user_rel';
+
+CREATE TRIGGER `group_scope_rel_version_insert` AFTER INSERT ON `group_scope_rel` FOR EACH ROW
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'group_scope_rel';
+CREATE TRIGGER `group_scope_rel_version_update` AFTER UPDATE ON `group_scope_rel` FOR EACH ROW
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'group_scope_rel';
+CREATE TRIGGER `group_scope_rel_version_delete` AFTER DELETE ON `group_scope_rel` FOR EACH ROW
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'group_scope_rel';
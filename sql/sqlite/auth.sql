@@ -1,6 +1,12 @@
 PRAGMA foreign_keys = ON;
 
+DROP TABLE IF EXISTS `user_fts`;
+DROP TABLE IF EXISTS `group_fts`;
+DROP TABLE IF EXISTS `scope_fts`;
+DROP TABLE IF EXISTS `table_version`;
 DROP TABLE IF EXISTS `email_code`;
+DROP TABLE IF EXISTS `token_epoch`;
+DROP TABLE IF EXISTS `user_scope`;
 DROP TABLE IF EXISTS `refresh_token`;
 DROP TABLE IF EXISTS `group_user_rel`;
 DROP TABLE IF EXISTS `group_scope_rel`;
@@ -63,6 +69,9 @@ CREATE TABLE `group_user_rel` (
     FOREIGN KEY (`user_id`) REFERENCES `user` (`id`)
 );
 
+CREATE INDEX `idx_group_user_rel_user_id` ON `group_user_rel` (`user_id`);
+CREATE INDEX `idx_group_scope_rel_scope_id` ON `group_scope_rel` (`scope_id`);
+
 -- 刷新令牌表
 CREATE TABLE `refresh_token` (
     `jti` VARCHAR(255) NOT NULL PRIMARY KEY,  -- JWT唯一标识
@@ -86,5 +95,135 @@ CREATE TABLE `email_code` (
     `create_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP  -- 创建时间
 );
 
-CREATE INDEX `idx_email_code_email` ON `email_code` (`email`);
+CREATE INDEX `idx_email_code_lookup` ON `email_code` (`email`, `type`, `used`, `expire_at`);
 CREATE INDEX `idx_email_code_expire_at` ON `email_code` (`expire_at`);
+
+-- 用户令牌代数表（仅按用户ID查询，不设外键，以免生成的实体继承 User）
+CREATE TABLE `token_epoch` (
+    `user_id` INTEGER NOT NULL PRIMARY KEY,  -- 用户ID
+    `epoch` INTEGER NOT NULL DEFAULT 0,  -- 令牌代数，撤销用户所有令牌时递增
+    `update_at` DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP  -- 更新时间
+);
+
+CREATE INDEX `idx_token_epoch_update_at` ON `token_epoch` (`update_at`);
+
+-- 用户有效权限表（物化已启用组的已启用权限，由关联和启用状态变更增量维护；不设外键，以免生成实体关系）
+CREATE TABLE `user_scope` (
+    `user_id` INTEGER NOT NULL,  -- 用户ID
+    `scope_id` INTEGER NOT NULL,  -- 权限范围ID
+    PRIMARY KEY (`user_id`, `scope_id`)
+);
+
+CREATE INDEX `idx_user_scope_scope_id` ON `user_scope` (`scope_id`);
+
+-- 表版本号（被跟踪的表每次插入、更新、删除时由触发器递增，用于生成条件请求的 ETag）
+CREATE TABLE `table_version` (
+    `name` VARCHAR(64) NOT NULL PRIMARY KEY,  -- 表名
+    `version` INTEGER NOT NULL DEFAULT 0  -- 修改计数
+);
+
+INSERT INTO `table_version` (`name`) VALUES
+    ('user'), ('group'), ('scope'), ('group_user_rel'), ('group_scope_rel');
+
+CREATE TRIGGER `user_version_insert` AFTER INSERT ON `user` BEGIN
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'user';
+END;
+CREATE TRIGGER `user_version_update` AFTER UPDATE ON `user` BEGIN
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'user';
+END;
+CREATE TRIGGER `user_version_delete` AFTER DELETE ON `user` BEGIN
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'user';
+END;
+
+CREATE TRIGGER `group_version_insert` AFTER INSERT ON `group` BEGIN
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'group';
+END;
+CREATE TRIGGER `group_version_update` AFTER UPDATE ON `group` BEGIN
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'group';
+END;
+CREATE TRIGGER `group_version_delete` AFTER DELETE ON `group` BEGIN
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'group';
+END;
+
+CREATE TRIGGER `scope_version_insert` AFTER INSERT ON `scope` BEGIN
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'scope';
+END;
+CREATE TRIGGER `scope_version_update` AFTER UPDATE ON `scope` BEGIN
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'scope';
+END;
+CREATE TRIGGER `scope_version_delete` AFTER DELETE ON `scope` BEGIN
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'scope';
+END;
+
+CREATE TRIGGER `group_user_rel_version_insert` AFTER INSERT ON `group_user_rel` BEGIN
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'group_user_rel';
+END;
+CREATE TRIGGER `group_user_rel_version_update` AFTER UPDATE ON `group_user_rel` BEGIN
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'group_user_rel';
+END;
+CREATE TRIGGER `group_user_rel_version_delete` AFTER DELETE ON `group_user_rel` BEGIN
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'group_user_rel';
+END;
+
+CREATE TRIGGER `group_scope_rel_version_insert` AFTER INSERT ON `group_scope_rel` BEGIN
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'group_scope_rel';
+END;
+CREATE TRIGGER `group_scope_rel_version_update` AFTER UPDATE ON `group_scope_rel` BEGIN
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'group_scope_rel';
+END;
+CREATE TRIGGER `group_scope_rel_version_delete` AFTER DELETE ON `group_scope_rel` BEGIN
+    UPDATE `table_version` SET `version` = `version` + 1 WHERE `name` = 'group_scope_rel';
+END;
+
+-- 关键字搜索索引（FTS5 trigram 分词，外部内容表，由触发器随写入同步；
+-- 已有数据的库可执行 INSERT INTO `user_fts` (`user_fts`) VALUES ('rebuild') 重建）
+CREATE VIRTUAL TABLE `user_fts` USING fts5(
+    `name`, `email`, content='user', content_rowid='id', tokenize='trigram'
+);
+
+CREATE TRIGGER `user_fts_insert` AFTER INSERT ON `user` BEGIN
+    INSERT INTO `user_fts` (rowid, `name`, `email`) VALUES (new.`id`, new.`name`, new.`email`);
+END;
+
+CREATE TRIGGER `user_fts_delete` AFTER DELETE ON `user` BEGIN
+    INSERT INTO `user_fts` (`user_fts`, rowid, `name`, `email`) VALUES ('delete', old.`id`, old.`name`, old.`email`);
+END;
+
+CREATE TRIGGER `user_fts_update` AFTER UPDATE OF `name`, `email` ON `user` BEGIN
+    INSERT INTO `user_fts` (`user_fts`, rowid, `name`, `email`) VALUES ('delete', old.`id`, old.`name`, old.`email`);
+    INSERT INTO `user_fts` (rowid, `name`, `email`) VALUES (new.`id`, new.`name`, new.`email`);
+END;
+
+CREATE VIRTUAL TABLE `group_fts` USING fts5(
+    `name`, content='group', content_rowid='id', tokenize='trigram'
+);
+
+CREATE TRIGGER `group_fts_insert` AFTER INSERT ON `group` BEGIN
+    INSERT INTO `group_fts` (rowid, `name`) VALUES (new.`id`, new.`name`);
+END;
+
+CREATE TRIGGER `group_fts_delete` AFTER DELETE ON `group` BEGIN
+    INSERT INTO `group_fts` (`group_fts`, rowid, `name`) VALUES ('delete', old.`id`, old.`name`);
+END;
+
+CREATE TRIGGER `group_fts_update` AFTER UPDATE OF `name` ON `group` BEGIN
+    INSERT INTO `group_fts` (`group_fts`, rowid, `name`) VALUES ('delete', old.`id`, old.`name`);
+    INSERT INTO `group_fts` (rowid, `name`) VALUES (new.`id`, new.`name`);
+END;
+
+CREATE VIRTUAL TABLE `scope_fts` USING fts5(
+    `name`, `description`, content='scope', content_rowid='id', tokenize='trigram'
+);
+
+CREATE TRIGGER `scope_fts_insert` AFTER INSERT ON `scope` BEGIN
+    INSERT INTO `scope_fts` (rowid, `name`, `description`) VALUES (new.`id`, new.`name`, new.`description`);
+END;
+
+CREATE TRIGGER `scope_fts_delete` AFTER DELETE ON `scope` BEGIN
+    INSERT INTO `scope_fts` (`scope_fts`, rowid, `name`, `description`) VALUES ('delete', old.`id`, old.`name`, old.`description`);
+END;
+
+CREATE TRIGGER `scope_fts_update` AFTER UPDATE OF `name`, `description` ON `scope` BEGIN
+    INSERT INTO `scope_fts` (`scope_fts`, rowid, `name`, `description`) VALUES ('delete', old.`id`, old.`name`, old.`description`);
+    INSERT INTO `scope_fts` (rowid, `name`, `description`) VALUES (new.`id`, new.`name`, new.`description`);
+END;
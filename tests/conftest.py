@@ -18,7 +18,8 @@ from app.repositories import group as group_repo
 from app.repositories import relation as relation_repo
 from app.repositories import scope as scope_repo
 from app.repositories import user as user_repo
-from app.utils import db
+from app.repositories import user_scope as user_scope_repo
+from app.utils import db, hasher
 
 
 class MySQLMock:
@@ -132,11 +133,13 @@ async def _create_admin_user():
             )
         elif admin_group not in admin_user.group:
             admin_user.name = CFG.admin.username
-            admin_user.password_hash = user_repo.passwd_hash.hash(CFG.admin.password)
+            admin_user.password_hash = await hasher.hash_password(CFG.admin.password)
             await relation_repo.add_user_group(
                 db_session, [(admin_user.id, admin_group.id)]
             )
 
+        # 重新计算管理员的有效权限
+        await user_scope_repo.refresh_users(db_session, [admin_user.id])
         await db_session.commit()
 
 
@@ -1,13 +1,20 @@
 """Admin管理API测试"""
 
+import json
 import uuid
 
 import pytest
 import pytest_asyncio
 from faker import Faker
 from httpx import AsyncClient
+from sqlalchemy import delete, event
 
 from app.config import CFG
+from app.entities.auth import UserScope
+from app.repositories import user as user_repo
+from app.repositories import user_scope as user_scope_repo
+from app.utils import db
+from tests.conftest import DB_DRIVER, db_mock
 
 fake = Faker("zh_CN")
 
@@ -110,6 +117,97 @@ class TestAdminUserAPI:
         )
         assert response.status_code == 422
 
+    @pytest.mark.asyncio
+    async def test_import_users(self, async_test_client, admin_headers):
+        """测试批量导入用户：逐行报告错误，成功的行加入指定组"""
+        group_response = await async_test_client.post(
+            "/api/admin/create_group", json=gen_test_group(), headers=admin_headers
+        )
+        group_id = group_response.json()["id"]
+        users = [gen_test_user() for _ in range(3)]
+        users[1]["password"] = "123"
+        content = "email,username,password\r\n" + "".join(
+            f"{u['email']},{u['username']},{u['password']}\r\n"
+            for u in [*users, users[0]]
+        )
+
+        response = await async_test_client.post(
+            "/api/admin/import_users",
+            params={"format": "csv", "group_ids": [group_id]},
+            content=content.encode(),
+            headers=admin_headers,
+        )
+        assert response.status_code == 200
+        data = response.json()
+        assert data["created"] == 2
+        assert data["failed"] == 2
+        assert [(e["line"], e["email"]) for e in data["errors"]] == [
+            (3, users[1]["email"]),
+            (5, users[0]["email"]),
+        ]
+        group_users = await async_test_client.get(
+            f"/api/admin/group/{group_id}/users", headers=admin_headers
+        )
+        emails = {u["email"] for u in group_users.json()["items"]}
+        assert emails == {users[0]["email"], users[2]["email"]}
+
+        login_response = await async_test_client.post(
+            "/api/login",
+            json={"email": users[2]["email"], "password": users[2]["password"]},
+        )
+        assert login_response.status_code == 200
+
+        # NDJSON 格式，邮箱已注册和无法解析的行
+        response = await async_test_client.post(
+            "/api/admin/import_users",
+            params={"format": "ndjson"},
+            content=f"{json.dumps(users[2])}\nnot json\n".encode(),
+            headers=admin_headers,
+        )
+        data = response.json()
+        assert data["created"] == 0
+        assert [e["message"] for e in data["errors"]] == ["邮箱已被注册", "格式错误"]
+
+    @pytest.mark.asyncio
+    async def test_import_users_conflict(
+        self, async_test_client, admin_headers, monkeypatch
+    ):
+        """测试批量导入时邮箱忽略大小写查重，写入冲突只记录冲突的行"""
+        registered = gen_test_user()
+        await async_test_client.post(
+            "/api/admin/create_user", json=registered, headers=admin_headers
+        )
+        users = [gen_test_user() for _ in range(2)]
+        rows = [users[0], {**users[0], "email": users[0]["email"].upper()}]
+        rows += [registered, users[1]]
+        content = "email,username,password\r\n" + "".join(
+            f"{u['email']},{u['username']},{u['password']}\r\n" for u in rows
+        )
+
+        # 模拟查重后其他请求注册了同一邮箱：查重查不到，写入时唯一索引冲突
+        async def no_existing(db_session, emails):
+            return set()
+
+        monkeypatch.setattr(user_repo, "get_existing_emails", no_existing)
+        response = await async_test_client.post(
+            "/api/admin/import_users",
+            params={"format": "csv"},
+            content=content.encode(),
+            headers=admin_headers,
+        )
+        data = response.json()
+        assert data["created"] == 2
+        assert [(e["line"], e["message"]) for e in data["errors"]] == [
+            (3, "邮箱已被注册"),
+            (4, "写入失败"),
+        ]
+        for user in users:
+            login_response = await async_test_client.post(
+                "/api/login",
+                json={"email": user["email"], "password": user["password"]},
+            )
+            assert login_response.status_code == 200
+
     @pytest.mark.asyncio
     async def test_list_users(self, async_test_client, admin_headers):
         """测试查询用户列表"""
@@ -155,6 +253,32 @@ class TestAdminUserAPI:
         data = response.json()
         assert data["total"] >= 1
 
+    @pytest.mark.asyncio
+    async def test_list_users_projection(self):
+        """测试用户列表只查询展示列，不加载密码哈希，也不构造 ORM 对象"""
+        statements = []
+
+        def on_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        async for db_session in db.get_db("test_auth", db_mock.db_url, DB_DRIVER)():
+            user = await user_repo.create(
+                db_session, fake.email(), fake.name(), fake.password()
+            )
+            engine = db_session.bind.sync_engine
+            event.listen(engine, "before_cursor_execute", on_execute)
+            try:
+                users, _ = await user_repo.ls(db_session, 0, 10)
+                info = await user_repo.get_info(db_session, user.id)
+            finally:
+                event.remove(engine, "before_cursor_execute", on_execute)
+            assert all("password_hash" not in statement for statement in statements)
+            assert users[0].id == user.id
+            assert not hasattr(users[0], "password_hash")
+            assert info.email == user.email
+            assert info.name == user.name
+            assert info.create_at == user.create_at
+
     @pytest.mark.asyncio
     async def test_get_user_detail(self, async_test_client, admin_headers):
         """测试查询用户详情"""
@@ -365,6 +489,64 @@ class TestAdminGroupAPI:
         data = response.json()
         assert len(data["items"]) <= 2
 
+    @pytest.mark.asyncio
+    async def test_list_groups_cursor(self, async_test_client, admin_headers):
+        """测试组列表游标分页与偏移分页结果一致"""
+        for _ in range(5):
+            await async_test_client.post(
+                "/api/admin/create_group", json=gen_test_group(), headers=admin_headers
+            )
+        response = await async_test_client.get(
+            "/api/admin/list_groups?limit=100", headers=admin_headers
+        )
+        expected = [g["id"] for g in response.json()["items"]]
+
+        ids = []
+        params = {"limit": 2}
+        while len(ids) < len(expected):
+            response = await async_test_client.get(
+                "/api/admin/list_groups", params=params, headers=admin_headers
+            )
+            assert response.status_code == 200
+            data = response.json()
+            ids.extend(g["id"] for g in data["items"])
+            if data["next_cursor"] is None:
+                break
+            # 传入游标时忽略 offset
+            params.update(cursor=data["next_cursor"], offset=999)
+        assert ids[: len(expected)] == expected
+
+        response = await async_test_client.get(
+            "/api/admin/list_groups?cursor=bad!", headers=admin_headers
+        )
+        assert response.status_code == 400
+
+    @pytest.mark.asyncio
+    async def test_list_groups_count_strategy(
+        self, async_test_client, admin_headers, monkeypatch
+    ):
+        """测试列表总数的缓存和估算策略"""
+        group_data = gen_test_group()
+        url = f"/api/admin/list_groups?keyword={group_data['name']}"
+
+        monkeypatch.setattr(CFG.db, "count_strategy", "cached")
+        data = (await async_test_client.get(url, headers=admin_headers)).json()
+        assert (data["total"], data["total_exact"]) == (0, True)
+        await async_test_client.post(
+            "/api/admin/create_group", json=group_data, headers=admin_headers
+        )
+        data = (await async_test_client.get(url, headers=admin_headers)).json()
+        assert (data["total"], data["total_exact"]) == (0, False)
+        assert len(data["items"]) == 1
+
+        monkeypatch.setattr(CFG.db, "count_strategy", "estimated")
+        response = await async_test_client.get(
+            "/api/admin/list_groups?limit=100", headers=admin_headers
+        )
+        data = response.json()
+        assert data["total_exact"] is False
+        assert data["total"] >= len(data["items"])
+
     @pytest.mark.asyncio
     async def test_list_groups_search(self, async_test_client, admin_headers):
         """测试组列表搜索"""
@@ -381,6 +563,44 @@ class TestAdminGroupAPI:
         data = response.json()
         assert data["total"] >= 1
 
+    @pytest.mark.asyncio
+    async def test_list_groups_search_index(self, async_test_client, admin_headers):
+        """测试关键字搜索索引随增删改同步，保持子串匹配语义"""
+        tag = uuid.uuid4().hex[:12]
+
+        async def search(keyword: str) -> list[int]:
+            response = await async_test_client.get(
+                "/api/admin/list_groups",
+                params={"keyword": keyword},
+                headers=admin_headers,
+            )
+            return [g["id"] for g in response.json()["items"]]
+
+        create_response = await async_test_client.post(
+            "/api/admin/create_group",
+            json={"name": f"Search_{tag}_group"},
+            headers=admin_headers,
+        )
+        group_id = create_response.json()["id"]
+        assert await search(tag[2:9]) == [group_id]  # 中间子串
+        assert await search(f"search_{tag[:4]}") == [group_id]  # 忽略大小写
+        assert group_id in await search("_g")  # 短关键字
+
+        await async_test_client.post(
+            "/api/admin/update_group",
+            json={"group_id": group_id, "name": f"renamed_{tag[::-1]}"},
+            headers=admin_headers,
+        )
+        assert await search(tag) == []
+        assert await search(tag[::-1]) == [group_id]
+
+        await async_test_client.post(
+            "/api/admin/remove_group",
+            json={"group_id": group_id},
+            headers=admin_headers,
+        )
+        assert await search(tag[::-1]) == []
+
     @pytest.mark.asyncio
     async def test_get_group_detail(self, async_test_client, admin_headers):
         """测试查询组详情"""
@@ -396,9 +616,52 @@ class TestAdminGroupAPI:
         assert response.status_code == 200
         data = response.json()
         assert data["name"] == group_data["name"]
-        assert "users" in data
+        assert data["user_count"] == 0
         assert "scopes" in data
 
+    @pytest.mark.asyncio
+    async def test_get_group_detail_etag(self, async_test_client, admin_headers):
+        """测试组详情和组列表条件请求：未变更返回 304，修改后返回新内容"""
+        create_response = await async_test_client.post(
+            "/api/admin/create_group", json=gen_test_group(), headers=admin_headers
+        )
+        group_id = create_response.json()["id"]
+        url = f"/api/admin/group/{group_id}"
+
+        response = await async_test_client.get(url, headers=admin_headers)
+        etag = response.headers["ETag"]
+        response = await async_test_client.get(
+            url, headers={**admin_headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.content == b""
+
+        # 不同查询参数的列表 ETag 不同
+        first = await async_test_client.get(
+            "/api/admin/list_groups?limit=10", headers=admin_headers
+        )
+        second = await async_test_client.get(
+            "/api/admin/list_groups?limit=20", headers=admin_headers
+        )
+        assert first.headers["ETag"] != second.headers["ETag"]
+
+        new_name = gen_test_group()["name"]
+        await async_test_client.post(
+            "/api/admin/update_group",
+            json={"group_id": group_id, "name": new_name},
+            headers=admin_headers,
+        )
+        response = await async_test_client.get(
+            url, headers={**admin_headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        assert response.json()["name"] == new_name
+        response = await async_test_client.get(
+            "/api/admin/list_groups?limit=10",
+            headers={**admin_headers, "If-None-Match": first.headers["ETag"]},
+        )
+        assert response.status_code == 200
+
     @pytest.mark.asyncio
     async def test_get_group_detail_not_found(self, async_test_client, admin_headers):
         """测试查询不存在的组详情"""
@@ -609,7 +872,7 @@ class TestAdminScopeAPI:
         data = response.json()
         assert data["name"] == scope_data["name"]
         assert "groups" in data
-        assert "users" in data
+        assert data["user_count"] == 0
 
     @pytest.mark.asyncio
     async def test_get_scope_detail_not_found(self, async_test_client, admin_headers):
@@ -929,6 +1192,43 @@ class TestAdminRelationAPI:
         scopes = group_detail.json()["scopes"]
         assert not any(s["id"] == scope_id for s in scopes)
 
+    @pytest.mark.asyncio
+    async def test_batch_relation_large(self, async_test_client, admin_headers):
+        """测试超过单批数量的关联添加和移除（含重复和已存在的关联）"""
+        group_response = await async_test_client.post(
+            "/api/admin/create_group", json=gen_test_group(), headers=admin_headers
+        )
+        group_id = group_response.json()["id"]
+        user_response = await async_test_client.post(
+            "/api/admin/create_user", json=gen_test_user(), headers=admin_headers
+        )
+        user_id = user_response.json()["id"]
+        relation = {"user_id": user_id, "group_id": group_id}
+        missing = [{"user_id": -i, "group_id": group_id} for i in range(1, 1000)]
+
+        for _ in range(2):
+            response = await async_test_client.post(
+                "/api/admin/user-group/add",
+                json={"relations": [relation, relation]},
+                headers=admin_headers,
+            )
+            assert response.status_code == 201
+        user_detail = await async_test_client.get(
+            f"/api/admin/user/{user_id}", headers=admin_headers
+        )
+        assert [g["id"] for g in user_detail.json()["groups"]] == [group_id]
+
+        response = await async_test_client.post(
+            "/api/admin/user-group/remove",
+            json={"relations": [*missing, relation]},
+            headers=admin_headers,
+        )
+        assert response.status_code == 200
+        user_detail = await async_test_client.get(
+            f"/api/admin/user/{user_id}", headers=admin_headers
+        )
+        assert user_detail.json()["groups"] == []
+
 
 class TestAdminComplexScenario:
     """复杂场景测试类"""
@@ -984,8 +1284,12 @@ class TestAdminComplexScenario:
             f"/api/admin/group/{group_id}", headers=admin_headers
         )
         group_data_detail = group_detail.json()
-        assert any(u["id"] == user_id for u in group_data_detail["users"])
+        assert group_data_detail["user_count"] == 1
         assert any(s["id"] == scope_id for s in group_data_detail["scopes"])
+        group_users = await async_test_client.get(
+            f"/api/admin/group/{group_id}/users", headers=admin_headers
+        )
+        assert [u["id"] for u in group_users.json()["items"]] == [user_id]
 
         # 验证权限包含组和用户
         scope_detail = await async_test_client.get(
@@ -993,7 +1297,146 @@ class TestAdminComplexScenario:
         )
         scope_data_detail = scope_detail.json()
         assert any(g["id"] == group_id for g in scope_data_detail["groups"])
-        assert any(u["id"] == user_id for u in scope_data_detail["users"])
+        assert scope_data_detail["user_count"] == 1
+        scope_users = await async_test_client.get(
+            f"/api/admin/scope/{scope_id}/users", headers=admin_headers
+        )
+        assert [u["id"] for u in scope_users.json()["items"]] == [user_id]
+
+    @pytest.mark.asyncio
+    async def test_login_scopes_follow_changes(self, async_test_client, admin_headers):
+        """测试登录签发的权限随关联和启用状态变更（有效权限缓存失效）"""
+
+        async def login_scopes() -> list[str]:
+            response = await async_test_client.post(
+                "/api/login",
+                json={"email": user_data["email"], "password": user_data["password"]},
+            )
+            assert response.status_code == 200
+            headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+            response = await async_test_client.post(
+                "/api/verify_access_token", headers=headers
+            )
+            return response.json()["scope"]
+
+        # 创建用户、组、权限
+        user_data = gen_test_user()
+        user_response = await async_test_client.post(
+            "/api/admin/create_user", json=user_data, headers=admin_headers
+        )
+        user_id = user_response.json()["id"]
+        group_response = await async_test_client.post(
+            "/api/admin/create_group", json=gen_test_group(), headers=admin_headers
+        )
+        group_id = group_response.json()["id"]
+        scope_data = gen_test_scope()
+        scope_response = await async_test_client.post(
+            "/api/admin/create_scope", json=scope_data, headers=admin_headers
+        )
+        scope_id = scope_response.json()["id"]
+        assert await login_scopes() == []
+
+        # 关联后登录即可获得权限
+        await async_test_client.post(
+            "/api/admin/user-group/add",
+            json={"relations": [{"user_id": user_id, "group_id": group_id}]},
+            headers=admin_headers,
+        )
+        await async_test_client.post(
+            "/api/admin/group-scope/add",
+            json={"relations": [{"group_id": group_id, "scope_id": scope_id}]},
+            headers=admin_headers,
+        )
+        assert await login_scopes() == [scope_data["name"]]
+
+        # 禁用组后权限失效
+        await async_test_client.post(
+            "/api/admin/update_group",
+            json={"group_id": group_id, "yn": 0},
+            headers=admin_headers,
+        )
+        assert await login_scopes() == []
+
+    @pytest.mark.asyncio
+    async def test_export(self, async_test_client, admin_headers):
+        """测试流式导出 NDJSON"""
+        user_data = gen_test_user()
+        user_response = await async_test_client.post(
+            "/api/admin/create_user", json=user_data, headers=admin_headers
+        )
+        user_id = user_response.json()["id"]
+        group_response = await async_test_client.post(
+            "/api/admin/create_group", json=gen_test_group(), headers=admin_headers
+        )
+        group_id = group_response.json()["id"]
+        await async_test_client.post(
+            "/api/admin/user-group/add",
+            json={"relations": [{"user_id": user_id, "group_id": group_id}]},
+            headers=admin_headers,
+        )
+
+        response = await async_test_client.get(
+            "/api/admin/export/users", headers=admin_headers
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        users = [json.loads(line) for line in response.text.splitlines()]
+        assert [u["id"] for u in users] == sorted(u["id"] for u in users)
+        user = next(u for u in users if u["id"] == user_id)
+        assert user["email"] == user_data["email"]
+        assert user["username"] == user_data["username"]
+        assert "password_hash" not in user
+
+        response = await async_test_client.get(
+            "/api/admin/export/user_groups", headers=admin_headers
+        )
+        edges = [json.loads(line) for line in response.text.splitlines()]
+        assert {"user_id": user_id, "group_id": group_id} in edges
+
+        response = await async_test_client.get(
+            "/api/admin/export/passwords", headers=admin_headers
+        )
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_rebuild_user_scope(self, async_test_client, admin_headers):
+        """测试重建用户有效权限物化表"""
+        user_data = gen_test_user()
+        user_response = await async_test_client.post(
+            "/api/admin/create_user", json=user_data, headers=admin_headers
+        )
+        user_id = user_response.json()["id"]
+        group_response = await async_test_client.post(
+            "/api/admin/create_group", json=gen_test_group(), headers=admin_headers
+        )
+        group_id = group_response.json()["id"]
+        scope_response = await async_test_client.post(
+            "/api/admin/create_scope", json=gen_test_scope(), headers=admin_headers
+        )
+        scope_id = scope_response.json()["id"]
+        await async_test_client.post(
+            "/api/admin/user-group/add",
+            json={"relations": [{"user_id": user_id, "group_id": group_id}]},
+            headers=admin_headers,
+        )
+        await async_test_client.post(
+            "/api/admin/group-scope/add",
+            json={"relations": [{"group_id": group_id, "scope_id": scope_id}]},
+            headers=admin_headers,
+        )
+
+        async for db_session in db.get_db("test_auth", db_mock.db_url, DB_DRIVER)():
+            # 模拟数据漂移
+            await db_session.execute(
+                delete(UserScope).where(UserScope.user_id == user_id)
+            )
+            await db_session.commit()
+            assert await user_scope_repo.get_scopes(db_session, user_id) == []
+
+            # 重建后恢复
+            assert await user_scope_repo.rebuild(db_session) > 0
+            scopes = await user_scope_repo.get_scopes(db_session, user_id)
+            assert [s.id for s in scopes] == [scope_id]
 
     @pytest.mark.asyncio
     async def test_multiple_users_one_group(self, async_test_client, admin_headers):
@@ -1027,10 +1470,24 @@ class TestAdminComplexScenario:
         group_detail = await async_test_client.get(
             f"/api/admin/group/{group_id}", headers=admin_headers
         )
-        group_users = group_detail.json()["users"]
-        assert len(group_users) == 5
-        for user_id in user_ids:
-            assert any(u["id"] == user_id for u in group_users)
+        assert group_detail.json()["user_count"] == 5
+
+        # 游标分页获取组内用户
+        group_users = []
+        params = {"limit": 2}
+        while True:
+            response = await async_test_client.get(
+                f"/api/admin/group/{group_id}/users",
+                params=params,
+                headers=admin_headers,
+            )
+            data = response.json()
+            assert data["total"] == 5
+            group_users.extend(u["id"] for u in data["items"])
+            if data["next_cursor"] is None:
+                break
+            params["cursor"] = data["next_cursor"]
+        assert group_users == sorted(user_ids, reverse=True)
 
     @pytest.mark.asyncio
     async def test_one_user_multiple_groups(self, async_test_client, admin_headers):
@@ -1069,6 +1526,121 @@ class TestAdminComplexScenario:
         for group_id in group_ids:
             assert any(g["id"] == group_id for g in user_groups)
 
+    @pytest.mark.asyncio
+    async def test_scope_users_distinct(self, async_test_client, admin_headers):
+        """测试用户经由多个组拥有同一权限时只计一次"""
+        # 创建用户、权限和两个组
+        user_response = await async_test_client.post(
+            "/api/admin/create_user", json=gen_test_user(), headers=admin_headers
+        )
+        user_id = user_response.json()["id"]
+        scope_response = await async_test_client.post(
+            "/api/admin/create_scope", json=gen_test_scope(), headers=admin_headers
+        )
+        scope_id = scope_response.json()["id"]
+        group_ids = []
+        for _ in range(2):
+            group_response = await async_test_client.post(
+                "/api/admin/create_group", json=gen_test_group(), headers=admin_headers
+            )
+            group_ids.append(group_response.json()["id"])
+
+        # 两个组都拥有该权限，用户加入两个组
+        await async_test_client.post(
+            "/api/admin/group-scope/add",
+            json={
+                "relations": [
+                    {"group_id": gid, "scope_id": scope_id} for gid in group_ids
+                ]
+            },
+            headers=admin_headers,
+        )
+        await async_test_client.post(
+            "/api/admin/user-group/add",
+            json={
+                "relations": [
+                    {"user_id": user_id, "group_id": gid} for gid in group_ids
+                ]
+            },
+            headers=admin_headers,
+        )
+
+        # 验证用户只出现一次
+        users_response = await async_test_client.get(
+            f"/api/admin/scope/{scope_id}/users", headers=admin_headers
+        )
+        assert users_response.status_code == 200
+        data = users_response.json()
+        assert [u["id"] for u in data["items"]] == [user_id]
+        assert data["total"] == 1
+
+        detail_response = await async_test_client.get(
+            f"/api/admin/scope/{scope_id}", headers=admin_headers
+        )
+        assert detail_response.json()["user_count"] == 1
+
+    @pytest.mark.asyncio
+    async def test_scope_users_cursor(self, async_test_client, admin_headers):
+        """测试权限用户列表跨组合并分页，总数只在第一页返回"""
+        # 创建权限、两个组和三个用户，组 A 包含用户 1、2，组 B 包含用户 2、3
+        scope_response = await async_test_client.post(
+            "/api/admin/create_scope", json=gen_test_scope(), headers=admin_headers
+        )
+        scope_id = scope_response.json()["id"]
+        group_ids = []
+        for _ in range(2):
+            group_response = await async_test_client.post(
+                "/api/admin/create_group", json=gen_test_group(), headers=admin_headers
+            )
+            group_ids.append(group_response.json()["id"])
+        user_ids = []
+        for _ in range(3):
+            user_response = await async_test_client.post(
+                "/api/admin/create_user", json=gen_test_user(), headers=admin_headers
+            )
+            user_ids.append(user_response.json()["id"])
+        await async_test_client.post(
+            "/api/admin/group-scope/add",
+            json={
+                "relations": [
+                    {"group_id": gid, "scope_id": scope_id} for gid in group_ids
+                ]
+            },
+            headers=admin_headers,
+        )
+        relations = [
+            {"user_id": user_ids[0], "group_id": group_ids[0]},
+            {"user_id": user_ids[1], "group_id": group_ids[0]},
+            {"user_id": user_ids[1], "group_id": group_ids[1]},
+            {"user_id": user_ids[2], "group_id": group_ids[1]},
+        ]
+        await async_test_client.post(
+            "/api/admin/user-group/add",
+            json={"relations": relations},
+            headers=admin_headers,
+        )
+
+        # 第一页
+        response = await async_test_client.get(
+            f"/api/admin/scope/{scope_id}/users",
+            params={"limit": 2},
+            headers=admin_headers,
+        )
+        data = response.json()
+        assert [u["id"] for u in data["items"]] == [user_ids[2], user_ids[1]]
+        assert data["total"] == 3
+
+        # 第二页
+        response = await async_test_client.get(
+            f"/api/admin/scope/{scope_id}/users",
+            params={"limit": 2, "cursor": data["next_cursor"]},
+            headers=admin_headers,
+        )
+        data = response.json()
+        assert [u["id"] for u in data["items"]] == [user_ids[0]]
+        assert data["total"] is None
+        assert data["next_cursor"] is None
+
     @pytest.mark.asyncio
     async def test_full_user_lifecycle(self, async_test_client, admin_headers):
         """测试用户完整生命周期"""
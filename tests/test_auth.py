@@ -1,14 +1,27 @@
 """认证API测试"""
 
 import asyncio
-from datetime import datetime, timezone
+import time
+from datetime import datetime, timedelta, timezone
 
+import jwt
 import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519
 from faker import Faker
-from sqlalchemy import and_, desc, select
+from fastapi.responses import JSONResponse
+from sqlalchemy import and_, desc, event, select
 
+from app.config import CFG, RetiredKeyCfg
 from app.entities.auth import EmailCode
-from app.utils import db
+from app.repositories import effective_scope as effective_scope_repo
+from app.repositories import email_code as email_code_repo
+from app.repositories import scope as scope_repo
+from app.repositories import token as token_repo
+from app.repositories import token_epoch as token_epoch_repo
+from app.repositories import user as user_repo
+from app.services import token as token_service
+from app.utils import db, metrics
 from tests.conftest import DB_DRIVER, db_mock
 
 fake = Faker("zh_CN")
@@ -53,6 +66,232 @@ class TestAuthAPIBasic:
         assert response.status_code == 200
         assert response.json() == {"status": "healthy"}
 
+    @pytest.mark.asyncio
+    async def test_metrics_hasher(self, async_test_client):
+        """测试登录后暴露密码哈希进程池指标（仅管理员可查询）"""
+        await async_test_client.post(
+            "/api/login", json={"email": CFG.admin.email, "password": "wrong_pw"}
+        )
+        response = await async_test_client.get("/api/admin/metrics")
+        assert response.status_code == 401
+        login_response = await async_test_client.post(
+            "/api/login",
+            json={"email": CFG.admin.email, "password": CFG.admin.password},
+        )
+        headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+        response = await async_test_client.get("/api/admin/metrics", headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["hasher_exec_ms"]["count"] >= 1
+        assert data["hasher_wait_ms"]["count"] >= 1
+        assert data["hasher_queue_depth"] >= 0
+
+    @pytest.mark.asyncio
+    async def test_login_phase_timings(self, async_test_client, monkeypatch):
+        """测试登录分阶段耗时：失败的登录不加载权限"""
+        monkeypatch.setattr(CFG.log, "server_timing", True)
+        before = metrics.snapshot()
+
+        response = await async_test_client.post(
+            "/api/login", json={"email": CFG.admin.email, "password": "wrong_pw"}
+        )
+        assert response.status_code == 401
+        data = metrics.snapshot()
+        assert data["login_verify_ms"]["count"] == (
+            before.get("login_verify_ms", {"count": 0})["count"] + 1
+        )
+        assert data.get("login_scope_ms") == before.get("login_scope_ms")
+
+        response = await async_test_client.post(
+            "/api/login",
+            json={"email": CFG.admin.email, "password": CFG.admin.password},
+        )
+        assert response.status_code == 200
+        phases = [
+            p.split(";")[0] for p in response.headers["Server-Timing"].split(", ")
+        ]
+        assert phases == ["lookup", "verify", "scope", "token"]
+
+    @pytest.mark.asyncio
+    async def test_verify_access_token_cached(self, async_test_client):
+        """测试重复验证同一访问令牌命中缓存"""
+        login_response = await async_test_client.post(
+            "/api/login",
+            json={"email": CFG.admin.email, "password": CFG.admin.password},
+        )
+        headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+
+        await async_test_client.post("/api/verify_access_token", headers=headers)
+        hits = metrics.snapshot()["token_cache_hit"]
+        response = await async_test_client.post(
+            "/api/verify_access_token", headers=headers
+        )
+        assert response.status_code == 200
+        assert "*" in response.json()["scope"]
+        data = metrics.snapshot()
+        assert data["token_cache_hit"] == hits + 1
+
+    @pytest.mark.asyncio
+    async def test_error_response_render(self, async_test_client):
+        """测试错误响应经 pydantic-core 渲染，输出与标准 JSONResponse 一致"""
+        response = await async_test_client.post(
+            "/api/verify_access_token",
+            headers={"Authorization": "Bearer invalid_token"},
+        )
+        assert response.status_code == 401
+        assert response.headers["content-type"] == "application/json"
+        data = response.json()
+        assert data["exc_type"] == "InvalidAccessTokenError"
+        assert response.content == JSONResponse(data).body
+
+    @pytest.mark.asyncio
+    async def test_verify_access_tokens_batch(self, async_test_client):
+        """测试批量验证访问令牌"""
+        login_response = await async_test_client.post(
+            "/api/login",
+            json={"email": CFG.admin.email, "password": CFG.admin.password},
+        )
+        valid_token = login_response.json()["access_token"]
+        expired_token = jwt.encode(
+            {"sub": "1", "exp": time.time() - 10, "scope": "", "typ": "access"},
+            CFG.auth.secret_key,
+            CFG.auth.algorithm,
+            headers={"kid": CFG.auth.kid},
+        )
+
+        response = await async_test_client.post(
+            "/api/verify_access_tokens",
+            json={"tokens": [valid_token, "invalid_token", expired_token]},
+        )
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert len(results) == 3
+        assert "*" in results[0]["payload"]["scope"]
+        assert results[0]["code"] is None
+        assert results[1]["payload"] is None
+        assert results[1]["exc_type"] == "InvalidAccessTokenError"
+        assert results[2]["exc_type"] == "ExpiredAccessTokenError"
+
+    @pytest.mark.asyncio
+    async def test_auth_request_success(self, async_test_client):
+        """测试网关子请求认证成功只返回请求头"""
+        login_response = await async_test_client.post(
+            "/api/login",
+            json={"email": CFG.admin.email, "password": CFG.admin.password},
+        )
+        access_token = login_response.json()["access_token"]
+
+        response = await async_test_client.get(
+            "/api/auth_request", headers={"Authorization": f"Bearer {access_token}"}
+        )
+        assert response.status_code == 204
+        assert response.content == b""
+        assert response.headers["X-User-Id"]
+        assert "*" in response.headers["X-User-Scopes"].split()
+
+    @pytest.mark.asyncio
+    async def test_auth_request_invalid(self, async_test_client):
+        """测试网关子请求认证失败返回 401 且无响应体"""
+        response = await async_test_client.get(
+            "/api/auth_request", headers={"Authorization": "Bearer invalid_token"}
+        )
+        assert response.status_code == 401
+        assert response.content == b""
+        assert response.headers["X-Auth-Error"] == "InvalidAccessTokenError"
+
+    @pytest.mark.asyncio
+    async def test_get_credential(self):
+        """测试获取用户凭据"""
+        async for db_session in db.get_db("test_auth", db_mock.db_url, DB_DRIVER)():
+            user = await user_repo.get_credential_by_email(db_session, CFG.admin.email)
+            assert user is not None
+            assert user.yn == 1
+            assert user.password_hash
+            assert await user_repo.get_credential_by_id(db_session, user.id) == user
+            assert await user_repo.get_credential_by_email(db_session, "no@a.b") is None
+
+    @pytest.mark.asyncio
+    async def test_refresh_lookup_uses_scope_cache(self):
+        """测试刷新令牌的用户查询只查状态列，有效权限缓存命中时不再查询权限"""
+        statements = []
+
+        def on_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        async for db_session in db.get_db("test_auth", db_mock.db_url, DB_DRIVER)():
+            user = await user_repo.get_credential_by_email(db_session, CFG.admin.email)
+            await effective_scope_repo.get(db_session, user.id)
+            engine = db_session.bind.sync_engine
+            event.listen(engine, "before_cursor_execute", on_execute)
+            try:
+                assert await user_repo.get_yn(db_session, user.id) == 1
+                assert await effective_scope_repo.get(db_session, user.id) == ["*"]
+            finally:
+                event.remove(engine, "before_cursor_execute", on_execute)
+            assert len(statements) == 1
+            assert "password_hash" not in statements[0]
+            assert await user_repo.get_yn(db_session, -1) is None
+
+    @pytest.mark.asyncio
+    async def test_unit_of_work_rollback(self):
+        """测试工作单元模式：数据访问函数不提交，出现异常时整体回滚"""
+        name = f"uow_{time.time_ns()}"
+        get_test_db = db.get_db("test_auth", db_mock.db_url, DB_DRIVER)
+
+        db_gen = get_test_db()
+        db_session = await anext(db_gen)
+        await scope_repo.create(db_session, name, None)
+        with pytest.raises(RuntimeError):
+            await db_gen.athrow(RuntimeError())
+
+        async for db_session in get_test_db():
+            assert await scope_repo.get_by_name(db_session, name) is None
+
+    @pytest.mark.asyncio
+    async def test_consume_email_code(self):
+        """测试验证码只能消费一次，且只认最新的验证码"""
+        email = fake.email()
+        expire_at = datetime.now() + timedelta(minutes=10)
+        async for db_session in db.get_db("test_auth", db_mock.db_url, DB_DRIVER)():
+            await email_code_repo.create(
+                db_session, email, "111111", "register", expire_at
+            )
+            await email_code_repo.create(
+                db_session, email, "222222", "register", expire_at
+            )
+            assert not await email_code_repo.consume(
+                db_session, email, "111111", "register"
+            )
+            assert not await email_code_repo.consume(
+                db_session, email, "222222", "reset_password"
+            )
+            assert await email_code_repo.consume(
+                db_session, email, "222222", "register"
+            )
+            assert not await email_code_repo.consume(
+                db_session, email, "222222", "register"
+            )
+
+    @pytest.mark.asyncio
+    async def test_create_returns_server_defaults(self):
+        """测试创建后服务端默认值在 flush 时取回，访问属性不再查询数据库"""
+        statements = []
+
+        def on_execute(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        async for db_session in db.get_db("test_auth", db_mock.db_url, DB_DRIVER)():
+            scope = await scope_repo.create(db_session, f"eager_{time.time_ns()}")
+            engine = db_session.bind.sync_engine
+            event.listen(engine, "before_cursor_execute", on_execute)
+            try:
+                assert scope.id is not None
+                assert scope.yn == 1
+                assert scope.create_at is not None
+            finally:
+                event.remove(engine, "before_cursor_execute", on_execute)
+            assert statements == []
+
     # ==================== 发送验证码 ====================
     @pytest.mark.asyncio
     async def test_send_code_success(self, async_test_client):
@@ -254,6 +493,55 @@ class TestAuthAPIBasic:
         )
         assert response.status_code == 202
 
+    @pytest.mark.asyncio
+    async def test_me_etag(self, async_test_client):
+        """测试 /me 条件请求：未变更返回 304，修改用户名后返回新内容"""
+        user_data = gen_test_user()
+
+        # 准备：注册用户
+        await async_test_client.post(
+            "/api/send_email_code",
+            json={"email": user_data["email"], "type": "register"},
+        )
+        code = await _get_latest_verification_code(user_data["email"], "register")
+
+        register_response = await async_test_client.post(
+            "/api/register",
+            json={
+                "email": user_data["email"],
+                "code": code,
+                "username": user_data["username"],
+                "password": user_data["password"],
+            },
+        )
+        headers = {
+            "Authorization": f"Bearer {register_response.json()['access_token']}"
+        }
+
+        response = await async_test_client.get("/api/me", headers=headers)
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        assert response.headers["Cache-Control"] == "private, no-cache"
+
+        response = await async_test_client.get(
+            "/api/me", headers={**headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == etag
+
+        # 修改用户名后 ETag 变化
+        new_username = fake.name()
+        await async_test_client.post(
+            "/api/me/username", json={"username": new_username}, headers=headers
+        )
+        response = await async_test_client.get(
+            "/api/me", headers={**headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 200
+        assert response.json()["username"] == new_username
+        assert response.headers["ETag"] != etag
+
     @pytest.mark.asyncio
     async def test_update_username_same(self, async_test_client):
         """测试修改为相同用户名"""
@@ -349,6 +637,7 @@ class TestAuthAPIBasic:
             },
         )
         refresh_token = register_response.json()["refresh_token"]
+        access_token = register_response.json()["access_token"]
 
         # 准备：发送修改密码验证码
         await async_test_client.post(
@@ -366,6 +655,15 @@ class TestAuthAPIBasic:
             "/api/me/password", json={"password": new_password, "code": reset_code}
         )
         assert response.status_code == 202
+        new_access_token = response.json()["access_token"]
+
+        # 验证：修改前签发的访问令牌立即失效，新签发的访问令牌有效
+        old_headers = {"Authorization": f"Bearer {access_token}"}
+        response = await async_test_client.get("/api/me", headers=old_headers)
+        assert response.status_code == 401
+        new_headers = {"Authorization": f"Bearer {new_access_token}"}
+        response = await async_test_client.get("/api/me", headers=new_headers)
+        assert response.status_code == 200
 
         # 验证：使用新密码登录
         login_response = await async_test_client.post(
@@ -473,6 +771,111 @@ class TestAuthAPIBasic:
         assert response.status_code == 200
         assert "access_token" in response.json()
 
+    @pytest.mark.asyncio
+    async def test_refresh_token_reuse(self, async_test_client):
+        """测试刷新令牌重复使用"""
+        user_data = gen_test_user()
+
+        # 准备：注册用户
+        await async_test_client.post(
+            "/api/send_email_code",
+            json={"email": user_data["email"], "type": "register"},
+        )
+        code = await _get_latest_verification_code(user_data["email"], "register")
+
+        register_response = await async_test_client.post(
+            "/api/register",
+            json={
+                "email": user_data["email"],
+                "code": code,
+                "username": user_data["username"],
+                "password": user_data["password"],
+            },
+        )
+        refresh_token = register_response.json()["refresh_token"]
+        async_test_client.cookies.set("refresh_token", refresh_token)
+        response = await async_test_client.post("/api/refresh")
+        assert response.status_code == 200
+
+        # 本进程撤销的令牌命中撤销索引
+        async_test_client.cookies.set("refresh_token", refresh_token)
+        response = await async_test_client.post("/api/refresh")
+        assert response.status_code == 401
+
+        # 模拟令牌由其他进程撤销：撤销索引未命中，由条件更新拒绝
+        token_repo.REVOCATION_INDEX.clear()
+        async_test_client.cookies.set("refresh_token", refresh_token)
+        response = await async_test_client.post("/api/refresh")
+        assert response.status_code == 401
+
+    def test_revocation_index_prune(self, monkeypatch):
+        """测试撤销索引从最旧一端清理过期和超出容量的记录"""
+        now = [1000.0]
+        monkeypatch.setattr(token_repo.time, "time", lambda: now[0])
+        index = token_repo.RevocationIndex(retention=10, max_size=3)
+        index.revoke("a")
+        index.revoke("b")
+        index.revoke_user(1)
+        now[0] += 5
+        index.revoke("a")  # 重新撤销移到最新一端
+        now[0] += 6
+        index.revoke("c")
+        # b 已过期被清理，a 重新撤销后仍保留
+        assert index.maybe_revoked("a", 3, now[0])
+        assert not index.maybe_revoked("b", 3, now[0])
+        assert index.maybe_revoked("c", 3, now[0])
+        # 用户记录在下一次写入时清理
+        assert index.maybe_revoked("x", 1, 999.0)
+        index.revoke_user(2)
+        assert not index.maybe_revoked("x", 1, 999.0)
+        # 超出容量时丢弃最早的记录
+        index.revoke("d")
+        index.revoke("e")
+        assert not index.maybe_revoked("a", 3, now[0])
+        assert all(index.maybe_revoked(jti, 3, now[0]) for jti in "cde")
+
+    @pytest.mark.asyncio
+    async def test_token_epoch_sync(self, async_test_client):
+        """测试其他进程强制下线后同步令牌代数"""
+        user_data = gen_test_user()
+
+        # 准备：注册用户
+        await async_test_client.post(
+            "/api/send_email_code",
+            json={"email": user_data["email"], "type": "register"},
+        )
+        code = await _get_latest_verification_code(user_data["email"], "register")
+
+        register_response = await async_test_client.post(
+            "/api/register",
+            json={
+                "email": user_data["email"],
+                "code": code,
+                "username": user_data["username"],
+                "password": user_data["password"],
+            },
+        )
+        access_token = register_response.json()["access_token"]
+        headers = {"Authorization": f"Bearer {access_token}"}
+        response = await async_test_client.post(
+            "/api/verify_access_token", headers=headers
+        )
+        assert response.status_code == 200
+        user_id = response.json()["sub"]
+
+        # 模拟其他进程递增令牌代数：本进程内存中尚无记录
+        async for db_session in db.get_db("test_auth", db_mock.db_url, DB_DRIVER)():
+            assert await token_epoch_repo.bump(db_session, user_id) == 1
+        token_epoch_repo.EPOCHS.pop(user_id)
+        response = await async_test_client.get("/api/me", headers=headers)
+        assert response.status_code == 200
+
+        # 同步后访问令牌失效
+        async for db_session in db.get_db("test_auth", db_mock.db_url, DB_DRIVER)():
+            await token_epoch_repo.sync(db_session)
+        response = await async_test_client.get("/api/me", headers=headers)
+        assert response.status_code == 401
+
     # ==================== 登出 ====================
     @pytest.mark.asyncio
     async def test_logout(self, async_test_client):
@@ -538,3 +941,140 @@ class TestAuthAPIConcurrent:
         responses = await asyncio.gather(*[login() for _ in range(10)])
         tokens = [r.json()["access_token"] for r in responses]
         assert len(set(tokens)) == 10
+
+
+@pytest.fixture
+def eddsa_signing(tmp_path, monkeypatch):
+    """切换为 EdDSA 非对称签名"""
+    private_key = ed25519.Ed25519PrivateKey.generate()
+    key_file = tmp_path / "private.pem"
+    key_file.write_bytes(
+        private_key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+    )
+    monkeypatch.setattr(CFG.auth, "algorithm", "EdDSA")
+    monkeypatch.setattr(CFG.auth, "private_key", str(key_file))
+    token_service.reload_keys(CFG.auth)
+    yield
+    monkeypatch.undo()
+    token_service.reload_keys(CFG.auth)
+
+
+class TestAuthAPIJWKS:
+    """公钥发布及离线验证测试类"""
+
+    @pytest.mark.asyncio
+    async def test_jwks_symmetric_empty(self, async_test_client):
+        """测试对称算法不公开任何密钥"""
+        response = await async_test_client.get("/.well-known/jwks.json")
+        assert response.status_code == 200
+        assert response.json() == {"keys": []}
+        assert "max-age" in response.headers["Cache-Control"]
+
+    @pytest.mark.asyncio
+    async def test_jwks_offline_verify(self, async_test_client, eddsa_signing):
+        """测试下游服务使用 JWKS 离线验证访问令牌"""
+        login_response = await async_test_client.post(
+            "/api/login",
+            json={"email": CFG.admin.email, "password": CFG.admin.password},
+        )
+        assert login_response.status_code == 200
+        access_token = login_response.json()["access_token"]
+
+        # 获取公钥并离线验证
+        response = await async_test_client.get("/.well-known/jwks.json")
+        assert response.status_code == 200
+        keys = response.json()["keys"]
+        assert len(keys) == 1
+        assert "d" not in keys[0]  # 不泄露私钥
+        jwk = jwt.PyJWK(keys[0])
+        payload = jwt.decode(access_token, jwk.key, ["EdDSA"])
+        assert payload["typ"] == "access"
+        assert "*" in payload["scope"].split()
+
+        # 服务自身仍可验证
+        verify_response = await async_test_client.post(
+            "/api/verify_access_token",
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+        assert verify_response.status_code == 200
+
+
+@pytest.fixture
+def restore_keyring():
+    """测试结束后恢复配置中的密钥环"""
+    yield
+    token_service.reload_keys(CFG.auth)
+
+
+class TestAuthAPIKeyRotation:
+    """签名密钥轮换测试类"""
+
+    async def _login_admin(self, async_test_client) -> str:
+        response = await async_test_client.post(
+            "/api/login",
+            json={"email": CFG.admin.email, "password": CFG.admin.password},
+        )
+        assert response.status_code == 200
+        return response.json()["access_token"]
+
+    async def _verify(self, async_test_client, access_token: str) -> int:
+        response = await async_test_client.post(
+            "/api/verify_access_token",
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+        return response.status_code
+
+    @pytest.mark.asyncio
+    async def test_rotate_keeps_old_tokens_valid(
+        self, async_test_client, restore_keyring
+    ):
+        """测试轮换后旧令牌在旧密钥失效前仍可验证"""
+        old_token = await self._login_admin(async_test_client)
+        assert jwt.get_unverified_header(old_token)["kid"] == CFG.auth.kid
+
+        # 轮换：新密钥签名，旧密钥转为仅验签
+        retired = RetiredKeyCfg(
+            kid=CFG.auth.kid,
+            algorithm=CFG.auth.algorithm,
+            secret_key=CFG.auth.secret_key,
+        )
+        rotated = CFG.auth.model_copy(
+            update={"kid": "next", "secret_key": "n" * 64, "retired_keys": [retired]}
+        )
+        token_service.reload_keys(rotated)
+
+        new_token = await self._login_admin(async_test_client)
+        assert jwt.get_unverified_header(new_token)["kid"] == "next"
+        assert await self._verify(async_test_client, old_token) == 200
+        assert await self._verify(async_test_client, new_token) == 200
+
+        # 旧密钥过期后旧令牌失效
+        retired.not_after = datetime.now() - timedelta(seconds=1)
+        token_service.reload_keys(rotated)
+        assert await self._verify(async_test_client, old_token) == 401
+        assert await self._verify(async_test_client, new_token) == 200
+
+    @pytest.mark.asyncio
+    async def test_retired_key_not_after_with_timezone(
+        self, async_test_client, restore_keyring
+    ):
+        """测试带时区的旧密钥失效时间转为本地时间，验签不会出错"""
+        old_token = await self._login_admin(async_test_client)
+        expired = datetime.now(timezone.utc) - timedelta(seconds=1)
+        retired = RetiredKeyCfg(
+            kid=CFG.auth.kid,
+            algorithm=CFG.auth.algorithm,
+            secret_key=CFG.auth.secret_key,
+            not_after=expired.isoformat(),
+        )
+        assert retired.not_after.tzinfo is None
+        assert retired.not_after == expired.astimezone().replace(tzinfo=None)
+        rotated = CFG.auth.model_copy(
+            update={"kid": "next", "secret_key": "n" * 64, "retired_keys": [retired]}
+        )
+        token_service.reload_keys(rotated)
+        assert await self._verify(async_test_client, old_token) == 401